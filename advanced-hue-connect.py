@@ -15,10 +15,25 @@
 #  limitations under the License.
 
 import requests
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import errno
+import http.client
+import ipaddress
 import json
+import os
+import ssl
 import time
 import sys
 import socket
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 
 # Farben für Terminal-Ausgabe
@@ -31,6 +46,16 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# Gemeinsame Session: Keep-Alive-Verbindungen zur Bridge werden zwischen Anfragen wiederverwendet
+session = requests.Session()
+session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+# Lokaler Speicher für erhaltene API-Keys, je Bridge-ID
+CREDENTIALS_FILE = "hue_credentials.json"
+
+
 def print_colored(text, color):
     print(f"{color}{text}{Colors.ENDC}")
 
@@ -44,58 +69,254 @@ def check_port_open(ip, port):
     return result == 0
 
 
+# Obergrenze gleichzeitiger Verbindungen bei der Netzwerksuche und Reserve an Dateideskriptoren
+# für alles andere im Prozess (macOS erlaubt standardmäßig nur 256 offene Dateien)
+MAX_DISCOVERY_CONCURRENCY = 512
+FD_HEADROOM = 64
+# Wie oft eine Adresse nach "Too many open files" erneut geprüft wird
+EMFILE_RETRIES = 5
+
+
+def default_concurrency():
+    """Parallelität der Netzwerksuche, begrenzt durch das Limit offener Dateien abzüglich Reserve."""
+    if resource is None:
+        return MAX_DISCOVERY_CONCURRENCY
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit == resource.RLIM_INFINITY:
+        return MAX_DISCOVERY_CONCURRENCY
+    return max(1, min(MAX_DISCOVERY_CONCURRENCY, soft_limit - FD_HEADROOM))
+
+
+def get_local_network():
+    """Ermittelt das lokale /24-Netz anhand der Adresse der Standardroute."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # UDP-connect sendet keine Pakete, legt aber die ausgehende Schnittstelle fest
+        sock.connect(("8.8.8.8", 80))
+        local_ip = sock.getsockname()[0]
+    finally:
+        sock.close()
+    return ipaddress.ip_network(f"{local_ip}/24", strict=False)
+
+
+async def _probe_bridge(ip, port, timeout):
+    """Verbindet sich nicht-blockierend und fragt /api/config ab; liefert die Konfiguration oder None."""
+    ssl_context = None
+    if port == 443:
+        # Hue Bridges verwenden selbstsignierte Zertifikate
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port, ssl=ssl_context), timeout)
+    except OSError as e:
+        if e.errno in (errno.EMFILE, errno.ENFILE):
+            raise  # Keine freien Dateideskriptoren: das sagt nichts über den Host aus
+        return None
+    except asyncio.TimeoutError:
+        return None
+
+    try:
+        # HTTP/1.0, damit die Antwort ohne Chunked-Encoding bis zum Verbindungsende gelesen werden kann
+        writer.write(f"GET /api/config HTTP/1.0\r\nHost: {ip}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    except (OSError, asyncio.TimeoutError, ssl.SSLError):
+        return None
+    finally:
+        writer.close()
+
+    header, _, body = raw.partition(b"\r\n\r\n")
+    status_line = header.split(b"\r\n", 1)[0].split()
+    if len(status_line) < 2 or status_line[1] != b"200":
+        return None
+    try:
+        config = json.loads(body.decode("utf-8"))
+    except ValueError:
+        return None
+
+    # Nur Antworten mit Bridge-Kennung zählen, andere Webserver im Netz werden ignoriert
+    if isinstance(config, dict) and ("bridgeid" in config or "mac" in config):
+        return config
+    return None
+
+
+async def discover_bridges_async(network, ports=(80, 443), timeout=1.0, concurrency=None):
+    """Durchsucht alle Hosts eines Netzes gleichzeitig nach Hue Bridges.
+
+    Ohne concurrency richtet sich die Parallelität nach dem Limit offener Dateien. Gehen die
+    Dateideskriptoren trotzdem aus, wird die Parallelität halbiert und die Adresse erneut geprüft.
+    """
+    if concurrency is None:
+        concurrency = default_concurrency()
+    semaphore = asyncio.Semaphore(concurrency)
+    limit = {"current": concurrency}
+
+    async def reduce_concurrency(seen_limit):
+        if limit["current"] < seen_limit:
+            return  # Eine andere Prüfung hat die Parallelität bereits verringert
+        if limit["current"] == 1:
+            await asyncio.sleep(0.1)
+            return
+        reduction = limit["current"] // 2
+        limit["current"] -= reduction
+        print_colored(f"Zu viele offene Dateien, Suche läuft mit {limit['current']} parallelen Verbindungen weiter.",
+                      Colors.YELLOW)
+        # Freiwerdende Plätze dauerhaft belegen, damit weniger Verbindungen gleichzeitig offen sind
+        for _ in range(reduction):
+            await semaphore.acquire()
+
+    async def probe(ip, port):
+        for _ in range(EMFILE_RETRIES):
+            seen_limit = limit["current"]
+            async with semaphore:
+                try:
+                    return ip, port, await _probe_bridge(ip, port, timeout)
+                except OSError as e:
+                    if e.errno not in (errno.EMFILE, errno.ENFILE):
+                        raise
+            await reduce_concurrency(seen_limit)
+        print_colored(f"{ip}:{port} konnte mangels freier Dateideskriptoren nicht geprüft werden.", Colors.RED)
+        return ip, port, None
+
+    network = ipaddress.ip_network(network, strict=False)
+    tasks = [probe(str(host), port) for host in network.hosts() for port in ports]
+    bridges = {}
+    for ip, port, config in await asyncio.gather(*tasks):
+        # Eine Bridge antwortet meist auf 80 und 443; der erste Port in ports hat Vorrang
+        if config is not None and ip not in bridges:
+            bridges[ip] = {"ip": ip, "port": port, "config": config}
+    return [bridges[ip] for ip in sorted(bridges, key=ipaddress.ip_address)]
+
+
+def discover_bridges(network=None, ports=(80, 443), timeout=1.0):
+    """Synchroner Einstiegspunkt für discover_bridges_async; ohne network wird das lokale /24 durchsucht."""
+    if network is None:
+        network = get_local_network()
+    return asyncio.run(discover_bridges_async(network, ports, timeout))
+
+
+def print_discovered_bridges(bridges):
+    for i, bridge in enumerate(bridges, start=1):
+        config = bridge["config"]
+        print(f"{i}. {bridge['ip']} (Port {bridge['port']}) - {config.get('name', 'Unbekannt')}, "
+              f"ID: {config.get('bridgeid', 'Unbekannt')}")
+
+
+def choose_bridge(network=None):
+    """Sucht Bridges im Netz und lässt bei mehreren Treffern auswählen; liefert die IP oder None."""
+    if network is None:
+        try:
+            network = get_local_network()
+        except OSError as e:
+            print_colored(f"Lokales Netz konnte nicht ermittelt werden: {str(e)}", Colors.RED)
+            return None
+
+    print_colored(f"\nSuche Hue Bridges in {network}...", Colors.BLUE)
+    start = time.perf_counter()
+    bridges = discover_bridges(network)
+    print(f"Suche abgeschlossen in {time.perf_counter() - start:.2f} s")
+
+    if not bridges:
+        print_colored("Keine Bridge gefunden.", Colors.YELLOW)
+        return None
+
+    print_discovered_bridges(bridges)
+    if len(bridges) == 1:
+        return bridges[0]["ip"]
+
+    selection = input(f"Welche Bridge verwenden? (1-{len(bridges)}): ")
+    try:
+        return bridges[int(selection) - 1]["ip"]
+    except (ValueError, IndexError):
+        print_colored("Ungültige Auswahl.", Colors.RED)
+        return None
+
+
 def get_bridge_info(ip):
     """Holt detaillierte Informationen über die Bridge."""
     try:
-        response = requests.get(f"http://{ip}/api/config", timeout=5)
+        response = session.get(f"http://{ip}/api/config", timeout=5)
         return response.json()
     except Exception as e:
         print_colored(f"Fehler beim Abrufen der Bridge-Informationen: {str(e)}", Colors.RED)
         return {}
 
 
-def try_connect_without_button(ip, attempts=3):
+def _stopped(stop_event, delay=0):
+    """Wartet bis zu delay Sekunden; liefert True, sobald eine andere Methode erfolgreich war."""
+    if stop_event is None:
+        if delay:
+            time.sleep(delay)
+        return False
+    return stop_event.wait(delay)
+
+
+def _register(ip, data, stop_event=None, lock=None, path="/api", headers=None):
+    """Sendet eine Registrierungsanfrage an die Bridge und liefert die JSON-Antwort.
+
+    Laufen mehrere Methoden parallel, teilen sie sich lock: die Anfragen gehen nacheinander
+    raus, und stop_event wird noch unter dem Lock gesetzt, sobald eine davon einen Username
+    erhalten hat. Danach schickt keine Methode mehr eine Anfrage, es entsteht also höchstens
+    ein neuer Benutzer auf der Bridge. Liefert None, wenn bereits eine andere Methode erfolgreich war.
+    """
+    with lock or contextlib.nullcontext():
+        if stop_event is not None and stop_event.is_set():
+            return None
+        response = session.post(f"http://{ip}{path}", json=data, headers=headers, timeout=5)
+        result = response.json()
+        if stop_event is not None and "success" in result[0]:
+            stop_event.set()
+        return result
+
+
+def try_connect_without_button(ip, attempts=3, stop_event=None, lock=None):
     """Versucht, eine Verbindung ohne Link-Button-Druck herzustellen."""
     print_colored("\nVersuche direkte Verbindung ohne Link-Button...", Colors.BLUE)
 
     for i in range(attempts):
+        if _stopped(stop_event):
+            return None
         print(f"Versuch {i + 1}/{attempts}...")
         try:
             data = {"devicetype": f"hue_emergency_tool#{i}"}
-            response = requests.post(f"http://{ip}/api", json=data, timeout=5)
-            result = response.json()
-
+            result = _register(ip, data, stop_event, lock)
+            if result is None:
+                return None
             if "success" in result[0]:
                 return result[0]["success"]["username"]
 
             # Spezielle Debug-Anfrage für ältere Bridges
             data = {"devicetype": "hue_emergency_tool", "debug": True}
-            response = requests.post(f"http://{ip}/api", json=data, timeout=5)
-            result = response.json()
-
+            result = _register(ip, data, stop_event, lock)
+            if result is None:
+                return None
             if "success" in result[0]:
                 return result[0]["success"]["username"]
 
-            time.sleep(1)
+            _stopped(stop_event, 1)
         except Exception as e:
             print(f"Fehler: {str(e)}")
-            time.sleep(1)
+            _stopped(stop_event, 1)
 
     return None
 
 
-def try_connect_with_button(ip, attempts=5):
+def try_connect_with_button(ip, attempts=5, stop_event=None, interval=2, lock=None):
     """Normale Verbindungsmethode mit Link-Button."""
     print_colored("\nStandardmethode: Link-Button drücken", Colors.BLUE)
     print("Drücke jetzt den Link-Button auf deiner Hue Bridge...")
 
     for i in range(attempts):
+        if _stopped(stop_event):
+            return None
         try:
             print(f"Versuch {i + 1}/{attempts}...")
             data = {"devicetype": "hue_bridge_tool"}
-            response = requests.post(f"http://{ip}/api", json=data, timeout=5)
-            result = response.json()
-
+            result = _register(ip, data, stop_event, lock)
+            if result is None:
+                return None
             if "success" in result[0]:
                 return result[0]["success"]["username"]
             elif "error" in result[0] and result[0]["error"]["type"] == 101:
@@ -103,95 +324,593 @@ def try_connect_with_button(ip, attempts=5):
             else:
                 print(f"Unerwartete Antwort: {json.dumps(result)}")
 
-            time.sleep(2)
+            _stopped(stop_event, interval)
         except Exception as e:
             print(f"Fehler: {str(e)}")
-            time.sleep(1)
+            _stopped(stop_event, 1)
 
     return None
 
 
-def try_advanced_methods(ip):
+def try_advanced_methods(ip, stop_event=None, lock=None):
     """Versucht fortgeschrittene Methoden für problematische Bridges."""
     print_colored("\nVersuche fortgeschrittene Methoden für problematische Bridges...", Colors.BLUE)
 
-    # Methode 1: Spezielle Header
-    try:
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "Hue Bridge Emergency Connect"
-        }
-        data = {"devicetype": "emergency_connect"}
-        response = requests.post(f"http://{ip}/api", json=data, headers=headers, timeout=5)
-        result = response.json()
+    methods = [
+        # Methode 1: Spezielle Header
+        ("/api", {"devicetype": "emergency_connect"},
+         {"Content-Type": "application/json", "User-Agent": "Hue Bridge Emergency Connect"}),
+        # Methode 2: Alte API-Version
+        ("/api", {"devicetype": "hue_tool", "apiversion": "1.0"}, None),
+        # Methode 3: Versuche eine andere Route (beachte den Schrägstrich am Ende)
+        ("/api/", {"devicetype": "hue_tool"}, None)
+    ]
+
+    for path, data, headers in methods:
+        if _stopped(stop_event):
+            return None
+        try:
+            result = _register(ip, data, stop_event, lock, path, headers)
+            if result is None:
+                return None
+            if "success" in result[0]:
+                return result[0]["success"]["username"]
+        except Exception:
+            pass
 
-        if "success" in result[0]:
-            return result[0]["success"]["username"]
-    except:
-        pass
+    return None
 
-    # Methode 2: Alte API-Version
+
+def pair_bridge(ip, window=30):
+    """Startet alle Verbindungsmethoden gleichzeitig und liefert den ersten erhaltenen Username.
+
+    Die Link-Button-Methode fragt während des gesamten Fensters (die Bridge akzeptiert den
+    Button-Druck 30 Sekunden lang) regelmäßig an; sobald eine Methode erfolgreich ist, werden
+    die übrigen über stop_event beendet. Die Registrierungsanfragen selbst laufen über einen
+    gemeinsamen Lock, damit nicht mehrere Methoden gleichzeitig einen Benutzer anlegen.
+    """
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    strategies = [
+        lambda: try_connect_with_button(ip, attempts=max(1, window // 2), stop_event=stop_event, lock=lock),
+        lambda: try_connect_without_button(ip, stop_event=stop_event, lock=lock),
+        lambda: try_advanced_methods(ip, stop_event=stop_event, lock=lock)
+    ]
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(strategies))
+    futures = [executor.submit(strategy) for strategy in strategies]
     try:
-        data = {"devicetype": "hue_tool", "apiversion": "1.0"}
-        response = requests.post(f"http://{ip}/api", json=data, timeout=5)
-        result = response.json()
+        for future in concurrent.futures.as_completed(futures):
+            username = future.result()
+            if username:
+                return username
+        return None
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def bridge_key(bridge_info):
+    """Eindeutiger Schlüssel einer Bridge: Bridge-ID, ersatzweise die MAC-Adresse."""
+    if bridge_info.get("bridgeid"):
+        return bridge_info["bridgeid"].upper()
+    if bridge_info.get("mac"):
+        return bridge_info["mac"].replace(":", "").upper()
+    return None
 
-        if "success" in result[0]:
-            return result[0]["success"]["username"]
-    except:
-        pass
 
-    # Methode 3: Versuche eine andere Route
+def load_credentials(path=CREDENTIALS_FILE):
+    if not os.path.exists(path):
+        return {}
     try:
-        data = {"devicetype": "hue_tool"}
-        response = requests.post(f"http://{ip}/api/", json=data, timeout=5)  # Beachte den Schrägstrich am Ende
-        result = response.json()
+        with open(path, "r") as file:
+            return json.load(file)
+    except Exception as e:
+        print_colored(f"Gespeicherte Zugangsdaten konnten nicht gelesen werden: {str(e)}", Colors.YELLOW)
+        return {}
 
-        if "success" in result[0]:
-            return result[0]["success"]["username"]
-    except:
-        pass
 
+def save_credentials(credentials, path=CREDENTIALS_FILE):
+    # Nur für den eigenen Benutzer lesbar, da die Datei API-Keys enthält
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as file:
+        json.dump(credentials, file, indent=2)
+
+
+def find_stored_username(ip=None, bridge_info=None, path=CREDENTIALS_FILE):
+    """Sucht einen gespeicherten API-Key über die Bridge-ID oder die zuletzt bekannte IP."""
+    credentials = load_credentials(path)
+    key = bridge_key(bridge_info) if bridge_info else None
+    if key in credentials:
+        return key, credentials[key]["username"]
+    for stored_key, entry in credentials.items():
+        if ip is not None and entry.get("ip") == ip:
+            return stored_key, entry["username"]
+    return None, None
+
+
+def store_username(ip, bridge_info, username, path=CREDENTIALS_FILE):
+    key = bridge_key(bridge_info)
+    if key is None:
+        print_colored("Bridge-ID unbekannt, API-Key wird nicht gespeichert.", Colors.YELLOW)
+        return
+    credentials = load_credentials(path)
+    credentials[key] = {"username": username, "ip": ip, "name": bridge_info.get("name", "")}
+    save_credentials(credentials, path)
+    print(f"API-Key für Bridge {key} gespeichert in {path}")
+
+
+def forget_username(key, path=CREDENTIALS_FILE):
+    credentials = load_credentials(path)
+    if credentials.pop(key, None) is not None:
+        save_credentials(credentials, path)
+
+
+def connect_with_stored_username(ip, bridge_info=None, path=CREDENTIALS_FILE):
+    """Prüft einen gespeicherten API-Key mit einer einzigen Anfrage.
+
+    Entfernt wird der Key nur, wenn die Bridge ihn ausdrücklich ablehnt (Fehlertyp 1); ist die
+    Bridge nicht erreichbar, bleibt er für den nächsten Versuch gespeichert.
+    """
+    key, username = find_stored_username(ip, bridge_info, path)
+    if username is None:
+        return None
+    print_colored(f"\nGespeicherter API-Key für Bridge {key} gefunden, prüfe...", Colors.BLUE)
+    valid = check_username(ip, username)
+    if valid:
+        return username
+    if valid is False:
+        forget_username(key, path)
+    else:
+        print_colored("Gespeicherter API-Key bleibt erhalten.", Colors.YELLOW)
     return None
 
 
-def test_connection(ip, username):
-    """Testet die Verbindung mit dem erhaltenen Username."""
+# Hue-Fehlertyp für einen unbekannten oder gelöschten API-Key
+ERROR_UNAUTHORIZED_USER = 1
+
+
+def check_username(ip, username):
+    """Fragt die Lichter mit dem Username ab.
+
+    Liefert True bei Erfolg, False wenn die Bridge den Key als ungültig ablehnt, und None,
+    wenn die Bridge nicht erreichbar ist oder anders antwortet.
+    """
     try:
         # Versuche, Informationen über die Lichter zu erhalten
-        response = requests.get(f"http://{ip}/api/{username}/lights", timeout=5)
+        response = session.get(f"http://{ip}/api/{username}/lights", timeout=5)
         lights = response.json()
-
-        if isinstance(lights, dict) and not "error" in lights:
-            count = len(lights)
-            print_colored(f"\nVerbindung erfolgreich! Gefundene Lichter: {count}", Colors.GREEN)
-            return True
-        else:
-            print_colored("\nVerbindung fehlgeschlagen. Ungültiger API-Key.", Colors.RED)
-            return False
     except Exception as e:
         print_colored(f"\nFehler beim Testen der Verbindung: {str(e)}", Colors.RED)
+        return None
+
+    if isinstance(lights, dict) and not "error" in lights:
+        count = len(lights)
+        print_colored(f"\nVerbindung erfolgreich! Gefundene Lichter: {count}", Colors.GREEN)
+        return True
+    if isinstance(lights, list) and any(isinstance(entry, dict) and
+                                        entry.get("error", {}).get("type") == ERROR_UNAUTHORIZED_USER
+                                        for entry in lights):
+        print_colored("\nVerbindung fehlgeschlagen. Ungültiger API-Key.", Colors.RED)
         return False
+    print_colored(f"\nUnerwartete Antwort der Bridge: {json.dumps(lights)}", Colors.RED)
+    return None
+
+
+def test_connection(ip, username):
+    """Testet die Verbindung mit dem erhaltenen Username."""
+    return check_username(ip, username) is True
+
+
+class LightCommandQueue:
+    """Sammelt Lichtbefehle und sendet sie gebündelt und ratenbegrenzt an die Bridge.
+
+    Mehrere Änderungen am selben Licht werden zu einem Befehl zusammengefasst. Erhalten
+    mehrere Lichter denselben Zustand, werden vorhandene Gruppen, die nur aus diesen Lichtern
+    bestehen, per Gruppenbefehl geschaltet. Die Bridge verarbeitet etwa 10 Lichtbefehle und
+    einen Gruppenbefehl pro Sekunde; darüber hinaus gehende Befehle verwirft sie.
+    """
+
+    def __init__(self, ip, username, rate=10.0, group_rate=1.0):
+        self.base_url = f"http://{ip}/api/{username}"
+        self.light_interval = 1.0 / rate
+        self.group_interval = 1.0 / group_rate
+        self.pending_lights = {}
+        self.pending_groups = {}
+        self.next_light_time = 0.0
+        self.next_group_time = 0.0
+        self.commands_sent = 0
+
+    def set_light(self, light_id, state):
+        # Spätere Werte überschreiben frühere, es bleibt ein Befehl pro Licht
+        self.pending_lights.setdefault(str(light_id), {}).update(state)
+
+    def set_group(self, group_id, state):
+        self.pending_groups.setdefault(str(group_id), {}).update(state)
+
+    def _wait_for_slot(self, is_group):
+        now = time.monotonic()
+        # Nach einem Gruppenbefehl braucht die Bridge auch für Lichtbefehle eine Pause
+        next_time = max(self.next_light_time, self.next_group_time) if is_group else self.next_light_time
+        if next_time > now:
+            time.sleep(next_time - now)
+            now = next_time
+        self.next_light_time = now + self.light_interval
+        if is_group:
+            self.next_group_time = now + self.group_interval
+
+    def _send(self, path, state, is_group):
+        self._wait_for_slot(is_group)
+        self.commands_sent += 1
+        try:
+            result = session.put(f"{self.base_url}/{path}", json=state, timeout=5).json()
+        except Exception as e:
+            print_colored(f"Fehler bei {path}: {str(e)}", Colors.RED)
+            return False
+
+        errors = [entry["error"] for entry in result if isinstance(entry, dict) and "error" in entry]
+        for error in errors:
+            print_colored(f"Fehler bei {path}: {error.get('description', error)}", Colors.RED)
+        return not errors
+
+    def _plan_group_actions(self):
+        """Ersetzt Lichtbefehle mit gleichem Zustand durch passende Gruppenbefehle."""
+        by_state = {}
+        for light_id, state in self.pending_lights.items():
+            by_state.setdefault(json.dumps(state, sort_keys=True), set()).add(light_id)
+        if all(len(light_ids) < 2 for light_ids in by_state.values()):
+            return
+
+        try:
+            groups = session.get(f"{self.base_url}/groups", timeout=5).json()
+            all_lights = set(session.get(f"{self.base_url}/lights", timeout=5).json())
+        except Exception as e:
+            print_colored(f"Gruppen konnten nicht abgefragt werden: {str(e)}", Colors.YELLOW)
+            return
+        if not isinstance(groups, dict):
+            return
+        # Gruppe 0 enthält immer alle Lichter der Bridge
+        candidates = [("0", all_lights)] + [(group_id, set(group.get("lights", [])))
+                                            for group_id, group in groups.items()]
+        candidates.sort(key=lambda candidate: len(candidate[1]), reverse=True)
+
+        for key, light_ids in by_state.items():
+            remaining = set(light_ids)
+            for group_id, members in candidates:
+                # Eine Gruppe lohnt sich nur, wenn sie mehrere noch offene Lichter ersetzt
+                # und kein Licht mit anderem Zielzustand enthält
+                if len(members) >= 2 and members <= remaining and group_id not in self.pending_groups:
+                    self.pending_groups[group_id] = json.loads(key)
+                    remaining -= members
+            for light_id in light_ids - remaining:
+                del self.pending_lights[light_id]
+
+    def flush(self):
+        """Sendet alle ausstehenden Befehle; liefert die Anzahl fehlgeschlagener Befehle."""
+        self._plan_group_actions()
+        failures = 0
+        for group_id, state in self.pending_groups.items():
+            failures += not self._send(f"groups/{group_id}/action", state, True)
+        for light_id, state in self.pending_lights.items():
+            failures += not self._send(f"lights/{light_id}/state", state, False)
+        self.pending_groups.clear()
+        self.pending_lights.clear()
+        return failures
+
+
+def apply_scene(ip, username, scene, rate=10.0):
+    """Wendet eine Szene ({"lights": {id: state}, "groups": {id: state}}) über die Befehlswarteschlange an."""
+    queue = LightCommandQueue(ip, username, rate)
+    for group_id, state in scene.get("groups", {}).items():
+        queue.set_group(group_id, state)
+    for light_id, state in scene.get("lights", {}).items():
+        queue.set_light(light_id, state)
+
+    start = time.perf_counter()
+    failures = queue.flush()
+    print(f"{queue.commands_sent} Befehle in {time.perf_counter() - start:.2f} s gesendet, "
+          f"{failures} fehlgeschlagen")
+    return failures == 0
+
+
+def lights_main(argv):
+    parser = argparse.ArgumentParser(prog="advanced-hue-connect.py lights",
+                                     description="Szenen auf viele Lichter und Gruppen anwenden")
+    parser.add_argument("ip", help="IP-Adresse der Hue Bridge")
+    parser.add_argument("scene", nargs="?",
+                        help="JSON-Datei mit {\"lights\": {id: zustand}, \"groups\": {id: zustand}}")
+    parser.add_argument("--set", nargs=2, action="append", default=[], metavar=("LICHTER", "ZUSTAND"),
+                        help="Zustand (JSON) für kommagetrennte Licht-IDs setzen, z. B. --set 1,2,3 '{\"on\": false}'")
+    parser.add_argument("--username", help="API-Key (Standard: gespeicherter Key dieser Bridge)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Lichtbefehle pro Sekunde (Standard: 10)")
+    args = parser.parse_args(argv)
+
+    username = args.username or find_stored_username(args.ip)[1]
+    if not username:
+        print_colored("Kein API-Key bekannt. Verbinde dich zuerst oder gib --username an.", Colors.RED)
+        sys.exit(1)
+
+    scene = {"lights": {}, "groups": {}}
+    if args.scene:
+        with open(args.scene, "r") as file:
+            scene.update(json.load(file))
+    for light_ids, state in args.set:
+        for light_id in light_ids.split(","):
+            scene["lights"].setdefault(light_id.strip(), {}).update(json.loads(state))
+
+    if not apply_scene(args.ip, username, scene, args.rate):
+        sys.exit(1)
+
+
+class LightStateCache:
+    """Lokaler Zwischenspeicher aller Lichtzustände, gespeist aus dem Event-Stream der Bridge.
+
+    Nach einem einmaligen Abruf von /lights hält der Event-Stream (API v2, Server-Sent Events
+    unter /eventstream/clip/v2) den Zustand aktuell, sodass get() und snapshot() ohne
+    Netzwerkzugriff auskommen. Ist der Stream nicht verfügbar (ältere Bridges), wird
+    stattdessen regelmäßig abgefragt; dabei werden nur geänderte Werte übernommen und gemeldet.
+    """
+
+    def __init__(self, ip, username, poll_interval=5.0, eventstream_scheme="https", stream_timeout=120):
+        self.ip = ip
+        self.username = username
+        self.base_url = f"http://{ip}/api/{username}"
+        self.eventstream_scheme = eventstream_scheme
+        self.poll_interval = poll_interval
+        self.stream_timeout = stream_timeout
+        self.mode = None
+        self.events_received = 0
+        self.polls = 0
+        self._lights = {}
+        self._etag = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stream_socket = None
+        self._thread = None
+
+    # Öffentliche Schnittstelle
+
+    def start(self):
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        stream_socket = self._stream_socket
+        if stream_socket is not None:
+            # Unterbricht das blockierende Lesen des Event-Streams
+            try:
+                stream_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def get(self, light_id):
+        """Aktueller Zustand eines Lichts aus dem Speicher oder None."""
+        with self._lock:
+            state = self._lights.get(str(light_id))
+            return dict(state) if state is not None else None
+
+    def snapshot(self):
+        with self._lock:
+            return {light_id: dict(state) for light_id, state in self._lights.items()}
+
+    def subscribe(self, callback):
+        """Registriert callback(light_id, geänderte_werte); wird nur bei echten Änderungen aufgerufen."""
+        self._listeners.append(callback)
+
+    # Aktualisierung
+
+    def _apply(self, light_id, values):
+        with self._lock:
+            state = self._lights.setdefault(light_id, {})
+            changed = {key: value for key, value in values.items() if state.get(key) != value}
+            state.update(changed)
+        if changed:
+            for callback in self._listeners:
+                callback(light_id, changed)
+
+    def refresh(self):
+        """Fragt /lights einmal ab und übernimmt nur die Unterschiede zum Speicher.
+
+        Liefert die Bridge einen ETag, wird bedingt abgefragt (If-None-Match) und eine
+        unveränderte Antwort (304) gar nicht erst verarbeitet.
+        """
+        headers = {"If-None-Match": self._etag} if self._etag else {}
+        response = session.get(f"{self.base_url}/lights", headers=headers, timeout=5)
+        self.polls += 1
+        if response.status_code == 304:
+            return
+        lights = response.json()
+        if not isinstance(lights, dict):
+            raise ValueError(f"Unerwartete Antwort: {json.dumps(lights)}")
+        self._etag = response.headers.get("ETag")
+
+        for light_id, light in lights.items():
+            self._apply(light_id, light.get("state", {}))
+        with self._lock:
+            for light_id in set(self._lights) - set(lights):
+                del self._lights[light_id]
+
+    @staticmethod
+    def _v1_values(resource):
+        # Felder einer v2-Lichtressource in die v1-Zustandsfelder übersetzen
+        values = {}
+        if "on" in resource:
+            values["on"] = resource["on"]["on"]
+        if "dimming" in resource:
+            values["bri"] = max(1, min(254, round(resource["dimming"]["brightness"] * 2.54)))
+        if resource.get("color_temperature", {}).get("mirek") is not None:
+            values["ct"] = resource["color_temperature"]["mirek"]
+        if "color" in resource:
+            values["xy"] = [resource["color"]["xy"]["x"], resource["color"]["xy"]["y"]]
+        return values
+
+    def _handle_events(self, payload):
+        for container in json.loads(payload):
+            if container.get("type") != "update":
+                continue
+            self.events_received += 1
+            for resource in container.get("data", []):
+                id_v1 = resource.get("id_v1", "")
+                if resource.get("type") == "light" and id_v1.startswith("/lights/"):
+                    self._apply(id_v1.rsplit("/", 1)[1], self._v1_values(resource))
+
+    def _listen_event_stream(self):
+        """Liest den Event-Stream bis zum Verbindungsende; liefert False, wenn keine Verbindung zustande kam."""
+        host, _, port = self.ip.partition(":")
+        if self.eventstream_scheme == "https":
+            # Hue Bridges verwenden selbstsignierte Zertifikate
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            connection = http.client.HTTPSConnection(host, int(port or 443), timeout=5, context=context)
+        else:
+            connection = http.client.HTTPConnection(host, int(port or 80), timeout=5)
+
+        try:
+            connection.request("GET", "/eventstream/clip/v2",
+                               headers={"hue-application-key": self.username, "Accept": "text/event-stream"})
+            self._stream_socket = connection.sock
+            response = connection.getresponse()
+            if response.status != 200:
+                return False
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            return False
+
+        self.mode = "eventstream"
+        self._stream_socket.settimeout(self.stream_timeout)
+        data_lines = []
+        try:
+            while not self._stop.is_set():
+                line = response.readline()
+                if not line:
+                    break
+                line = line.decode("utf-8").rstrip("\r\n")
+                if line.startswith("data:"):
+                    data_lines.append(line[5:].strip())
+                elif not line and data_lines:
+                    self._handle_events("".join(data_lines))
+                    data_lines = []
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        finally:
+            self._stream_socket = None
+            connection.close()
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._listen_event_stream():
+                if self._stop.is_set():
+                    return
+                self.mode = "polling"
+                print_colored(f"Event-Stream nicht verfügbar, frage alle {self.poll_interval} s ab.", Colors.YELLOW)
+                self._poll()
+                return
+            if self._stop.wait(1):
+                return
+            # Verbindung unterbrochen: verpasste Änderungen abgleichen, dann neu verbinden
+            try:
+                self.refresh()
+            except Exception as e:
+                print_colored(f"Abgleich fehlgeschlagen: {str(e)}", Colors.RED)
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print_colored(f"Abfrage fehlgeschlagen: {str(e)}", Colors.RED)
+
+
+def watch_main(argv):
+    parser = argparse.ArgumentParser(prog="advanced-hue-connect.py watch",
+                                     description="Lichtzustände über den Event-Stream verfolgen")
+    parser.add_argument("ip", help="IP-Adresse der Hue Bridge")
+    parser.add_argument("--username", help="API-Key (Standard: gespeicherter Key dieser Bridge)")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="Abfrageintervall, falls kein Event-Stream verfügbar ist (Standard: 5)")
+    parser.add_argument("--http", action="store_true",
+                        help="Event-Stream per HTTP statt HTTPS abrufen (z. B. für den Hue Bridge Emulator)")
+    args = parser.parse_args(argv)
+
+    username = args.username or find_stored_username(args.ip)[1]
+    if not username:
+        print_colored("Kein API-Key bekannt. Verbinde dich zuerst oder gib --username an.", Colors.RED)
+        sys.exit(1)
+
+    cache = LightStateCache(args.ip, username, args.poll_interval, "http" if args.http else "https")
+    cache.subscribe(lambda light_id, changed: print(f"Licht {light_id}: {json.dumps(changed)}"))
+    cache.start()
+    print_colored(f"{len(cache.snapshot())} Lichter geladen. Strg+C beendet.", Colors.GREEN)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cache.stop()
+        print(f"Modus: {cache.mode}, Events: {cache.events_received}, Abfragen: {cache.polls}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Erweitertes Hue Bridge Verbindungstool")
+    parser.add_argument("ip", nargs="?",
+                        help="IP-Adresse der Hue Bridge, optional mit Port (ohne Angabe wird das Netz durchsucht)")
+    parser.add_argument("--discover", nargs="?", const="auto", metavar="CIDR",
+                        help="Nur nach Bridges suchen, z. B. 192.168.1.0/24 (Standard: lokales /24)")
+    return parser.parse_args()
 
 
 def main():
+    # Unterbefehle zur Lichtsteuerung und -beobachtung
+    if len(sys.argv) > 1 and sys.argv[1] == "lights":
+        lights_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        watch_main(sys.argv[2:])
+        return
+
+    args = parse_args()
+    if args.discover:
+        network = None if args.discover == "auto" else args.discover
+        start = time.perf_counter()
+        bridges = discover_bridges(network)
+        print_discovered_bridges(bridges)
+        print(f"{len(bridges)} Bridge(s) gefunden in {time.perf_counter() - start:.2f} s")
+        return
+
     print_colored("===================================", Colors.BOLD)
     print_colored("ERWEITERTES HUE BRIDGE VERBINDUNGSTOOL", Colors.BOLD)
     print_colored("===================================", Colors.BOLD)
     print("Dieses Tool versucht mehrere Methoden, um eine Verbindung zur Hue Bridge herzustellen.")
 
-    # Frage nach der IP-Adresse
-    if len(sys.argv) > 1:
-        bridge_ip = sys.argv[1]
-    else:
+    # IP-Adresse aus den Argumenten, per Netzwerksuche oder manuell
+    bridge_ip = args.ip or choose_bridge()
+    if not bridge_ip:
         bridge_ip = input("Gib die IP-Adresse deiner Hue Bridge ein: ")
 
+    # Bekannte Bridge: gespeicherten API-Key mit einer einzigen Anfrage prüfen
+    username = connect_with_stored_username(bridge_ip)
+    if username:
+        print_colored(f"\nVerbunden mit gespeichertem API-Key: {username}", Colors.GREEN)
+        return
+
     # Prüfe die grundlegende Erreichbarkeit
+    # Optionaler Port (IP:PORT), z. B. für den Hue Bridge Emulator
+    host, _, port = bridge_ip.partition(":")
+    port = int(port or 80)
     print_colored(f"\nPrüfe Erreichbarkeit von {bridge_ip}...", Colors.BLUE)
-    if check_port_open(bridge_ip, 80):
-        print_colored("✓ Bridge ist erreichbar (Port 80 ist offen)", Colors.GREEN)
+    if check_port_open(host, port):
+        print_colored(f"✓ Bridge ist erreichbar (Port {port} ist offen)", Colors.GREEN)
     else:
-        print_colored("✗ Bridge scheint nicht erreichbar zu sein (Port 80 geschlossen)", Colors.RED)
+        print_colored(f"✗ Bridge scheint nicht erreichbar zu sein (Port {port} geschlossen)", Colors.RED)
         response = input("Trotzdem fortfahren? (j/n): ")
         if response.lower() != 'j':
             sys.exit(1)
@@ -204,29 +923,22 @@ def main():
         print(f"MAC: {bridge_info.get('mac', 'Unbekannt')}")
         print(f"Firmware: {bridge_info.get('swversion', 'Unbekannt')}")
 
+        # Die IP kann sich geändert haben, die Bridge-ID nicht
+        username = connect_with_stored_username(bridge_ip, bridge_info)
+        if username:
+            print_colored(f"\nVerbunden mit gespeichertem API-Key: {username}", Colors.GREEN)
+            store_username(bridge_ip, bridge_info, username)
+            return
+
     # Verbindungsmethoden
     print_colored("\nStarte Verbindungsprozess...", Colors.BLUE)
 
-    # Methode 1: Standard mit Link-Button
-    username = try_connect_with_button(bridge_ip)
-    if username:
-        print_colored(f"\nERFOLG! API-Key erhalten: {username}", Colors.GREEN)
-        test_connection(bridge_ip, username)
-        return
-
-    # Methode 2: Ohne Link-Button
-    print_colored("\nStandard-Methode fehlgeschlagen. Versuche alternative Methoden...", Colors.YELLOW)
-    username = try_connect_without_button(bridge_ip)
-    if username:
-        print_colored(f"\nERFOLG! API-Key erhalten: {username}", Colors.GREEN)
-        test_connection(bridge_ip, username)
-        return
-
-    # Methode 3: Fortgeschrittene Methoden
-    username = try_advanced_methods(bridge_ip)
+    # Alle Methoden (Link-Button, ohne Link-Button, fortgeschritten) laufen gleichzeitig
+    username = pair_bridge(bridge_ip)
     if username:
         print_colored(f"\nERFOLG! API-Key erhalten: {username}", Colors.GREEN)
-        test_connection(bridge_ip, username)
+        if test_connection(bridge_ip, username) and bridge_info:
+            store_username(bridge_ip, bridge_info, username)
         return
 
     # Wenn alle Methoden fehlschlagen
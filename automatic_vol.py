@@ -1,9 +1,33 @@
+import argparse
+import hashlib
+import glob
+import importlib
+import json
 import os
+import shutil
+import statistics
+import time
+
+# Startzeitpunkt für die Messung der Zeit bis zur ersten Entscheidung
+_START_TIME = time.perf_counter()
+
+
+class _LazyModule:
+    """Platzhalter, der ein schweres Modul erst beim ersten Attributzugriff importiert."""
+
+    def __init__(self, module_name, alias, on_load=None):
+        self._module_name = module_name
+        self._alias = alias
+        self._on_load = on_load
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._module_name)
+        # Platzhalter durch das echte Modul ersetzen, damit weitere Zugriffe direkt erfolgen
+        globals()[self._alias] = module
+        if self._on_load is not None:
+            self._on_load(module)
+        return getattr(module, attr)
 
-import cv2
-import numpy as np
-import pytesseract
-from PIL import ImageGrab, Image
 
 # Pfad zu Tesseract-OCR festlegen - überprüfe diesen für dein System
 # Häufige Pfade für macOS mit Homebrew
@@ -12,11 +36,100 @@ tesseract_paths = [
     '/usr/local/bin/tesseract'
 ]
 
-for path in tesseract_paths:
-    if os.path.exists(path):
-        pytesseract.pytesseract.tesseract_cmd = path
-        print(f"Tesseract gefunden unter: {path}")
-        break
+# Zwischenspeicher für Pfad, Version und Sprachen von Tesseract
+STATE_FILE = "automatic_vol_state.json"
+_tesseract_cmd = None
+_engine = None
+
+# Sprachen für die Texterkennung
+OCR_LANG = "deu+eng"
+
+
+def _configure_tesseract(module):
+    if _tesseract_cmd:
+        module.pytesseract.tesseract_cmd = _tesseract_cmd
+
+
+cv2 = _LazyModule("cv2", "cv2")
+np = _LazyModule("numpy", "np")
+pytesseract = _LazyModule("pytesseract", "pytesseract", _configure_tesseract)
+Image = _LazyModule("PIL.Image", "Image")
+ImageGrab = _LazyModule("PIL.ImageGrab", "ImageGrab")
+
+
+def _tessdata_dirs(cmd):
+    # Sprachdaten liegen je nach Installation neben der Binary oder unter TESSDATA_PREFIX
+    candidates = [os.environ.get("TESSDATA_PREFIX")]
+    for binary in (cmd, os.path.realpath(cmd)):
+        prefix = os.path.dirname(os.path.dirname(binary))
+        candidates.append(os.path.join(prefix, "share", "tessdata"))
+        candidates.extend(glob.glob(os.path.join(prefix, "share", "tesseract-ocr", "*", "tessdata")))
+    return sorted({path for path in candidates if path and os.path.isdir(path)})
+
+
+def probe_tesseract(state_file=STATE_FILE, refresh=False):
+    """Ermittelt Pfad, Version und Sprachen von Tesseract.
+
+    Das Ergebnis wird in state_file abgelegt und wiederverwendet, solange sich weder die
+    Tesseract-Binary noch die tessdata-Verzeichnisse ändern (z. B. durch neue Sprachpakete);
+    nur dann oder mit refresh=True werden die Subprozesse erneut gestartet.
+    """
+    global _tesseract_cmd
+
+    cmd = next((path for path in tesseract_paths if os.path.exists(path)), None)
+    if cmd:
+        print(f"Tesseract gefunden unter: {cmd}")
+    else:
+        cmd = shutil.which("tesseract")
+    if cmd is None:
+        raise pytesseract.pytesseract.TesseractNotFoundError()
+    _tesseract_cmd = cmd
+    if not isinstance(pytesseract, _LazyModule):
+        _configure_tesseract(pytesseract)
+    key = {
+        "cmd": cmd,
+        "mtime": os.path.getmtime(cmd),
+        "tessdata": {path: os.path.getmtime(path) for path in _tessdata_dirs(cmd)}
+    }
+
+    if not refresh:
+        try:
+            with open(state_file, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if all(state.get(name) == value for name, value in key.items()):
+                return state
+        except (OSError, ValueError):
+            pass
+
+    state = dict(key,
+                 version=str(pytesseract.get_tesseract_version()),
+                 languages=pytesseract.get_languages())
+    try:
+        with open(state_file, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+    except OSError as e:
+        print(f"Tesseract-Informationen konnten nicht gespeichert werden: {e}")
+    return state
+
+
+def ensure_tesseract():
+    """Prüft Tesseract beim ersten Bedarf, also erst wenn tatsächlich OCR nötig ist."""
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    engine = probe_tesseract()
+    missing = [lang for lang in OCR_LANG.split("+") if lang not in engine["languages"]]
+    if missing:
+        # Sprachpakete könnten seit dem Zwischenspeichern installiert worden sein
+        engine = probe_tesseract(refresh=True)
+        missing = [lang for lang in OCR_LANG.split("+") if lang not in engine["languages"]]
+    print("Tesseract Version:", engine["version"])
+    print("Verfügbare Sprachen:", engine["languages"])
+    if missing:
+        print(f"Warnung: Sprachpakete fehlen: {', '.join(missing)}")
+    _engine = engine
+    return engine
 
 
 def set_volume(level):
@@ -37,11 +150,24 @@ def set_volume(level):
 #    volume.SetMasterVolumeLevel(level, None)
 
 
-def capture_screen_region():
+# Bildschirmbereich für die Texterkennung und das dafür verwendete Vorverarbeitungsprofil
+# TODO: SUCHE DEN ENTSPRECHENDEN BILDSCHIRM AUSSCHNITT
+SCREEN_REGION = {
+    "origin": (130, 312),
+    "size": (100, 30),
+    "profile": "median"
+}
+
+# Vorverarbeitungsprofile, sortiert von schnell nach gründlich
+# "full" entspricht der ursprünglichen Kette mit fastNlMeansDenoising
+PREPROCESSING_PROFILES = ("none", "median", "bilateral", "full")
+DEFAULT_PROFILE = "median"
+
+
+def capture_screen_region(region=SCREEN_REGION):
     # Definition des Ursprungs und der Rechteckgröße
-    # TODO: SUCHE DEN ENTSPRECHENDEN BILDSCHIRM AUSSCHNITT
-    origin_x, origin_y = 130, 312
-    rect_width, rect_height = 100, 30
+    origin_x, origin_y = region["origin"]
+    rect_width, rect_height = region["size"]
 
     # Berechnung der Koordinaten des Rechtecks
     x1 = origin_x
@@ -61,43 +187,100 @@ def capture_screen_region():
     return screenshot, screenshot_cv
 
 
-def perform_ocr(pil_image, cv_image):
+class PreprocessBuffers:
+    """Zwischenpuffer für perform_ocr, die zwischen Frames gleicher Größe wiederverwendet werden."""
+
+    def __init__(self, scale_factor=2):
+        self.scale_factor = scale_factor
+        self.shape = None
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+    def prepare(self, cv_image):
+        # Puffer nur neu anlegen, wenn sich die Größe des Bereichs ändert
+        shape = cv_image.shape[:2]
+        if shape == self.shape:
+            return
+        self.shape = shape
+        height, width = shape
+        scaled_shape = (height * self.scale_factor, width * self.scale_factor)
+        self.gray = np.empty(shape, dtype=np.uint8)
+        self.scaled = np.empty(scaled_shape, dtype=np.uint8)
+        self.denoised = np.empty(scaled_shape, dtype=np.uint8)
+        self.enhanced = np.empty(scaled_shape, dtype=np.uint8)
+        self.binary = np.empty(scaled_shape, dtype=np.uint8)
+        self.adaptive = np.empty(scaled_shape, dtype=np.uint8)
+
+
+def denoise(scaled, profile, dst):
+    # Rauschminderung je nach Profil; Bildschirmtext ist meist scharf genug für die schnellen Varianten
+    if profile == "none":
+        return scaled
+    if profile == "median":
+        return cv2.medianBlur(scaled, 3, dst=dst)
+    if profile == "bilateral":
+        return cv2.bilateralFilter(scaled, 5, 50, 50, dst=dst)
+    if profile == "full":
+        return cv2.fastNlMeansDenoising(scaled, dst, 10, 7, 21)
+    raise ValueError(f"Unbekanntes Vorverarbeitungsprofil: {profile}")
+
+
+def _stop_timer(timings, stage, start):
+    """Addiert die seit start vergangene Zeit zu timings[stage] und liefert den neuen Startzeitpunkt."""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (now - start)
+    return now
+
+
+def perform_ocr(pil_image, cv_image, timings=None, profile=DEFAULT_PROFILE, buffers=None):
     # Mehrere Bildverarbeitungsmethoden für bessere OCR-Ergebnisse
+    # Optional werden die Laufzeiten der einzelnen Stufen (in Sekunden) in timings gesammelt.
+    # Mit buffers werden die Zwischenbilder in wiederverwendete Puffer geschrieben; die
+    # zurückgegebenen Bilder sind dann nur bis zum nächsten Aufruf gültig.
+    ensure_tesseract()
+    if buffers is None:
+        buffers = PreprocessBuffers()
+    buffers.prepare(cv_image)
+    start = time.perf_counter()
 
     # 1. Graustufenbild
-    gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY, dst=buffers.gray)
+    start = _stop_timer(timings, "grayscale", start)
 
     # 2. Größere Skalierung für bessere Erkennung
-    scale_factor = 2
-    scaled = cv2.resize(gray, None, fx=scale_factor, fy=scale_factor, interpolation=cv2.INTER_CUBIC)
+    scaled = cv2.resize(gray, buffers.scaled.shape[::-1], dst=buffers.scaled, interpolation=cv2.INTER_CUBIC)
+    start = _stop_timer(timings, "resize", start)
 
     # 3. Rauschminderung
-    denoised = cv2.fastNlMeansDenoising(scaled, None, 10, 7, 21)
+    denoised = denoise(scaled, profile, buffers.denoised)
+    start = _stop_timer(timings, "denoise", start)
 
     # 4. Kontrastverstärkung durch CLAHE (Contrast Limited Adaptive Histogram Equalization)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(denoised)
+    enhanced = buffers.clahe.apply(denoised, dst=buffers.enhanced)
+    start = _stop_timer(timings, "clahe", start)
 
     # 5. Schwellenwertverfahren
     # 5.1 Einfache Schwellenwertbildung
-    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=buffers.binary)
 
     # 5.2 Adaptive Schwellenwertbildung
     adaptive = cv2.adaptiveThreshold(
         enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY, 11, 2
+        cv2.THRESH_BINARY, 11, 2, dst=buffers.adaptive
     )
+    _stop_timer(timings, "threshold", start)
 
     # Verschiedene Bilder für OCR verwenden
     images = [
-        {"name": "Original PIL", "img": pil_image, "lang": "deu+eng"},
-        {"name": "Original", "img": gray, "lang": "deu+eng"},
-        {"name": "Binär", "img": binary, "lang": "deu+eng"},
-        {"name": "Adaptiv", "img": adaptive, "lang": "deu+eng"}
+        {"name": "Original PIL", "img": pil_image, "lang": OCR_LANG},
+        {"name": "Original", "img": gray, "lang": OCR_LANG},
+        {"name": "Binär", "img": binary, "lang": OCR_LANG},
+        {"name": "Adaptiv", "img": adaptive, "lang": OCR_LANG}
     ]
 
     results = []
     for img_data in images:
+        start = time.perf_counter()
         try:
             if isinstance(img_data["img"], Image.Image):
                 text = pytesseract.image_to_string(img_data["img"], lang=img_data["lang"])
@@ -118,6 +301,8 @@ def perform_ocr(pil_image, cv_image):
         except Exception as e:
             print(f"Fehler bei {img_data['name']}: {e}")
 
+        _stop_timer(timings, f"tesseract ({img_data['name']})", start)
+
     # Bilder für die Visualisierung zurückgeben
     processed_images = {
         "gray": gray,
@@ -128,58 +313,436 @@ def perform_ocr(pil_image, cv_image):
     return results, processed_images
 
 
-def main():
+# Verzeichnis mit gelernten Referenzbildern für den Template-Modus
+TEMPLATE_DIR = "ocr_templates"
+TEMPLATE_THRESHOLD = 0.9
+# Höchstzahl abweichender Pixel in einer 3x3-Nachbarschaft der binarisierten Glyphen.
+# Schon ein anderes Zeichen erzeugt zusammenhängende Abweichungen; einzelne Pixel stammen
+# dagegen von Rauschen oder Kantenglättung.
+MAX_GLYPH_MISMATCH = 1
+
+
+class TemplateMatcher:
+    """Erkennt bekannte UI-Texte per Hash-Lookup bzw. cv2.matchTemplate statt mit Tesseract.
+
+    Die Referenzbilder werden einmalig mit learn() aufgenommen und mit ihrem Text in
+    TEMPLATE_DIR/index.json abgelegt. matchTemplate sucht nur die Position; akzeptiert wird
+    ein Treffer erst, wenn auch die binarisierten Glyphen übereinstimmen.
+    """
+
+    def __init__(self, directory=TEMPLATE_DIR, threshold=TEMPLATE_THRESHOLD, max_mismatch=MAX_GLYPH_MISMATCH):
+        self.directory = directory
+        self.threshold = threshold
+        self.max_mismatch = max_mismatch
+        self.index_path = os.path.join(directory, "index.json")
+        self.entries = []
+        self.templates = []
+        self.hashes = {}
+        self.load()
+
+    @staticmethod
+    def _binarize(gray):
+        _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return binary
+
+    @classmethod
+    def _frame_hash(cls, gray):
+        # Binarisiertes Bild als Schlüssel: identische Bildschirminhalte ergeben denselben Hash
+        packed = np.packbits(cls._binarize(gray))
+        return hashlib.blake2b(packed.tobytes() + str(gray.shape).encode(), digest_size=16).hexdigest()
+
+    @classmethod
+    def _glyph_mismatch(cls, gray, template):
+        # Maximale Anzahl abweichender Pixel in einer 3x3-Nachbarschaft
+        diff = cls._binarize(gray) ^ cls._binarize(template)
+        return int(cv2.boxFilter(diff, cv2.CV_32F, (3, 3), normalize=False).max())
+
+    @staticmethod
+    def _is_uniform(gray):
+        # Einfarbige Bereiche passen per matchTemplate auf jeden Frame
+        return float(gray.std()) < 1.0
+
+    def load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as file:
+            self.entries = json.load(file)
+        for entry in self.entries:
+            template = cv2.imread(os.path.join(self.directory, entry["file"]), cv2.IMREAD_GRAYSCALE)
+            if template is None:
+                print(f"Template konnte nicht gelesen werden: {entry['file']}")
+                continue
+            if self._is_uniform(template):
+                print(f"Template ohne Inhalt wird ignoriert: {entry['file']}")
+                continue
+            self.templates.append((entry["text"], template))
+            self.hashes[self._frame_hash(template)] = entry["text"]
+
+    def learn(self, text, cv_image):
+        """Speichert den aktuellen Bereich als Referenzbild für text."""
+        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        if self._is_uniform(gray):
+            raise ValueError("Der Bereich ist einfarbig und enthält keinen Text")
+
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = f"template_{len(self.entries):03d}.png"
+        cv2.imwrite(os.path.join(self.directory, file_name), gray)
+        self.entries.append({"text": text, "file": file_name})
+        self.templates.append((text, gray))
+        self.hashes[self._frame_hash(gray)] = text
+        with open(self.index_path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=2, ensure_ascii=False)
+        print(f"Template für '{text}' gespeichert: {file_name}")
+
+    def match(self, cv_image):
+        """Liefert (Text, Score) des besten Templates; Text ist None, wenn kein Template sicher passt."""
+        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        text = self.hashes.get(self._frame_hash(gray))
+        if text is not None:
+            return text, 1.0
+
+        best_text, best_score, best_mismatch = None, 0.0, None
+        rejected_score = 0.0
+        for template_text, template in self.templates:
+            height, width = template.shape
+            if height > gray.shape[0] or width > gray.shape[1]:
+                continue
+            _, score, _, (x, y) = cv2.minMaxLoc(cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED))
+            if score < self.threshold:
+                continue
+            mismatch = self._glyph_mismatch(gray[y:y + height, x:x + width], template)
+            if mismatch > self.max_mismatch:
+                rejected_score = max(rejected_score, score)
+                continue
+            if best_mismatch is None or (mismatch, -score) < (best_mismatch, -best_score):
+                best_text, best_score, best_mismatch = template_text, score, mismatch
+
+        if best_text is None:
+            return None, rejected_score
+        return best_text, best_score
+
+
+def recognize_text(pil_image, cv_image, matcher=None, timings=None, profile=DEFAULT_PROFILE, buffers=None):
+    # Schneller Pfad über gelernte Templates, Tesseract nur bei unsicheren Treffern
+    if matcher is not None:
+        start = time.perf_counter()
+        text, score = matcher.match(cv_image)
+        _stop_timer(timings, "template", start)
+        if text is not None:
+            return [{"method": "Template", "text": text, "score": score}], None
+
+    return perform_ocr(pil_image, cv_image, timings, profile, buffers)
+
+
+class PollingScheduler:
+    """Passt das Abfrageintervall an: schnell nach einer Änderung, exponentiell langsamer bei ruhigem Bild."""
+
+    def __init__(self, min_interval=0.5, max_interval=8.0, backoff=2.0, pixel_threshold=32):
+        if min_interval <= 0 or min_interval > max_interval:
+            raise ValueError("Es muss 0 < min_interval <= max_interval gelten")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.pixel_threshold = pixel_threshold
+        self.interval = min_interval
+        self.previous = None
+        self.frames_captured = 0
+        self.frames_processed = 0
+
+    def frame_changed(self, cv_image):
+        """Vergleicht den Frame mit dem vorherigen und passt das Intervall an.
+
+        Schon ein einziges Pixel, das sich um mehr als pixel_threshold ändert, gilt als Änderung,
+        da sich Dateinamen oft nur in einem Zeichen unterscheiden.
+        """
+        self.frames_captured += 1
+        changed = (self.previous is None or self.previous.shape != cv_image.shape
+                   or np.count_nonzero(cv2.absdiff(cv_image, self.previous) > self.pixel_threshold) > 0)
+        self.previous = cv_image
+
+        if changed:
+            self.frames_processed += 1
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return changed
+
+    def wait_ms(self):
+        return max(1, int(self.interval * 1000))
+
+    def stats(self):
+        return f"Frames erfasst: {self.frames_captured}, davon mit OCR verarbeitet: {self.frames_processed}"
+
+
+def load_replay_frames(source):
+    """Liefert (Name, PIL-Bild, OpenCV-Bild) für alle PNG-Frames eines Verzeichnisses oder einer Videodatei."""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.lower().endswith(".png"):
+                continue
+            cv_image = cv2.imread(os.path.join(source, name), cv2.IMREAD_COLOR)
+            if cv_image is None:
+                print(f"Frame konnte nicht gelesen werden: {name}")
+                continue
+            yield name, Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)), cv_image
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise IOError(f"Video konnte nicht geöffnet werden: {source}")
+    try:
+        index = 0
+        while True:
+            ok, cv_image = capture.read()
+            if not ok:
+                break
+            yield f"frame_{index:06d}", Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)), cv_image
+            index += 1
+    finally:
+        capture.release()
+
+
+def load_labels(labels_path, source):
+    """Lädt die erwarteten Texte pro Frame.
+
+    Bei einem Verzeichnis ist der Schlüssel der Dateiname ({"frame.png": "text"}), bei einer
+    Videodatei der nullbasierte Frame-Index im Format frame_000000 ({"frame_000042": "text"}).
+    Ohne expliziten Pfad wird nach einer labels.json im Replay-Verzeichnis gesucht.
+    """
+    if labels_path is None and os.path.isdir(source):
+        candidate = os.path.join(source, "labels.json")
+        if os.path.exists(candidate):
+            labels_path = candidate
+    if labels_path is None:
+        return {}
+
+    with open(labels_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _normalize_text(text):
+    return " ".join(text.split())
+
+
+def print_stage_report(stage_times, frame_times):
+    """Gibt Mittelwert, Median und Maximum pro Verarbeitungsstufe in Millisekunden aus."""
+    print(f"{'Stufe':<28}{'Mittel':>10}{'Median':>10}{'Max':>10}")
+    for stage, values in stage_times.items():
+        print(f"{stage:<28}{statistics.mean(values) * 1000:>10.2f}"
+              f"{statistics.median(values) * 1000:>10.2f}{max(values) * 1000:>10.2f}")
+    print(f"{'gesamt pro Frame':<28}{statistics.mean(frame_times) * 1000:>10.2f}"
+          f"{statistics.median(frame_times) * 1000:>10.2f}{max(frame_times) * 1000:>10.2f}")
+
+
+def run_replay(source, labels_path=None, profile=DEFAULT_PROFILE, verbose=True, matcher=None):
+    """Spielt aufgezeichnete Frames ohne GUI durch perform_ocr und misst Laufzeit und Erkennungsrate.
+
+    Liefert eine Zusammenfassung (Frames, Zeit pro Frame, Treffer) für den Profilvergleich.
+    """
+    labels = load_labels(labels_path, source)
+    buffers = PreprocessBuffers()
+    stage_times = {}
+    frame_times = []
+    method_hits = {}
+    labeled_frames = 0
+    frame_hits = 0
+
+    print(f"Replay von {source} mit Profil '{profile}' ({len(labels)} Labels)")
+    for name, pil_image, cv_image in load_replay_frames(source):
+        timings = {}
+        frame_start = time.perf_counter()
+        results, _ = recognize_text(pil_image, cv_image, matcher, timings, profile, buffers)
+        frame_times.append(time.perf_counter() - frame_start)
+        for stage, duration in timings.items():
+            stage_times.setdefault(stage, []).append(duration)
+
+        texts = {result["method"]: _normalize_text(result["text"]) for result in results}
+        expected = labels.get(name)
+        if expected is None:
+            if verbose:
+                print(f"{name}: {texts}")
+            continue
+
+        expected = _normalize_text(expected)
+        labeled_frames += 1
+        for method in texts:
+            method_hits.setdefault(method, 0)
+        if any(expected in text for text in texts.values()):
+            frame_hits += 1
+        for method, text in texts.items():
+            if text == expected:
+                method_hits[method] = method_hits.get(method, 0) + 1
+        if verbose:
+            print(f"{name}: erwartet '{expected}', erkannt {texts}")
+
+    if not frame_times:
+        print("Keine Frames gefunden.")
+        return None
+
+    print("-" * 58)
+    print(f"Frames: {len(frame_times)}, "
+          f"Durchsatz: {len(frame_times) / sum(frame_times):.2f} Frames/s")
+    print_stage_report(stage_times, frame_times)
+
+    if labeled_frames:
+        print("-" * 58)
+        print(f"Treffer (Label in einem Ergebnis enthalten): "
+              f"{frame_hits}/{labeled_frames} ({frame_hits / labeled_frames:.1%})")
+        for method, hits in method_hits.items():
+            print(f"Exakt ({method}): {hits}/{labeled_frames} ({hits / labeled_frames:.1%})")
+
+    return {
+        "profile": profile,
+        "frames": len(frame_times),
+        "frame_time": statistics.mean(frame_times),
+        "labeled": labeled_frames,
+        "hits": frame_hits
+    }
+
+
+def compare_profiles(source, labels_path=None):
+    """Führt den Replay für alle Vorverarbeitungsprofile aus und stellt Zeit pro Frame und Genauigkeit gegenüber.
+
+    Templates werden dabei bewusst nicht verwendet, da Template-Treffer die Vorverarbeitung umgehen.
+    """
+    summaries = []
+    for profile in PREPROCESSING_PROFILES:
+        summary = run_replay(source, labels_path, profile, verbose=False)
+        if summary is None:
+            return
+        summaries.append(summary)
+
+    print("=" * 58)
+    print(f"{'Profil':<12}{'ms/Frame':>12}{'Frames/s':>12}{'Genauigkeit':>16}")
+    for summary in summaries:
+        accuracy = f"{summary['hits']}/{summary['labeled']}" if summary["labeled"] else "-"
+        print(f"{summary['profile']:<12}{summary['frame_time'] * 1000:>12.2f}"
+              f"{1 / summary['frame_time']:>12.2f}{accuracy:>16}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bildschirm-OCR mit automatischer Lautstärkeregelung")
+    parser.add_argument("--replay", metavar="QUELLE",
+                        help="Verzeichnis mit PNG-Frames oder Videodatei ohne GUI verarbeiten (Benchmark)")
+    parser.add_argument("--labels", metavar="JSON",
+                        help="Erwartete Texte pro Frame für die Genauigkeitsmessung: "
+                             "{\"datei.png\": \"text\"} für Verzeichnisse, "
+                             "{\"frame_000000\": \"text\"} (nullbasierter Index) für Videos")
+    parser.add_argument("--profile", choices=PREPROCESSING_PROFILES + ("alle",),
+                        help="Vorverarbeitungsprofil für den Replay ('alle' vergleicht sämtliche Profile); "
+                             f"Standard ist das Profil des Bildschirmbereichs ({SCREEN_REGION['profile']})")
+    parser.add_argument("--templates", action="store_true",
+                        help=f"Gelernte Templates aus {TEMPLATE_DIR} verwenden, Tesseract nur als Rückfallebene")
+    parser.add_argument("--min-interval", type=float, default=0.5, metavar="SEK",
+                        help="Abfrageintervall direkt nach einer Änderung (Standard: 0.5)")
+    parser.add_argument("--max-interval", type=float, default=8.0, metavar="SEK",
+                        help="Maximales Abfrageintervall bei unverändertem Bereich (Standard: 8.0)")
+    parser.add_argument("--learn", metavar="TEXT",
+                        help="Aktuellen Bildschirmbereich (oder --learn-image) als Template für TEXT speichern")
+    parser.add_argument("--learn-image", metavar="PNG",
+                        help="Bilddatei statt Bildschirmaufnahme für --learn verwenden")
+    args = parser.parse_args()
+    if args.profile == "alle" and args.templates:
+        parser.error("--profile alle vergleicht die Vorverarbeitung und ist mit --templates nicht kombinierbar")
+    if args.min_interval <= 0:
+        parser.error("--min-interval muss größer als 0 sein")
+    if args.min_interval > args.max_interval:
+        parser.error("--min-interval darf nicht größer als --max-interval sein")
+    return args
+
+
+def learn_template(text, image_path=None):
+    if image_path:
+        cv_image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if cv_image is None:
+            print(f"Bild konnte nicht gelesen werden: {image_path}")
+            return
+    else:
+        _, cv_image = capture_screen_region()
+    try:
+        TemplateMatcher().learn(text, cv_image)
+    except ValueError as e:
+        print(f"Template nicht gespeichert: {e}")
+
+
+def main(matcher=None, scheduler=None):
     print("Programm zur optischen Zeichenerkennung gestartet")
     print("Ursprung bei (200, 200) mit Rechteckgröße 100x30 Pixel")
     print("Drücke 'q', um das Programm zu beenden")
 
+    # Puffer werden zwischen den Frames wiederverwendet
+    buffers = PreprocessBuffers()
+    if scheduler is None:
+        scheduler = PollingScheduler()
+    first_decision = True
+
     try:
         while True:
             # Bildschirmbereich erfassen
             pil_image, cv_image = capture_screen_region()
 
-            # OCR durchführen
-            results, processed_images = perform_ocr(pil_image, cv_image)
-
-            # Erkannten Text ausgeben
-            print("-" * 40)
-            if results:
-                for result in results:
-                    print(f"Erkannter Text ({result['method']}): {result['text']}")
-                    # TODO: ÄNDERE LAUTSTÄRKE
-                    if 'row_2.pdf' in result['text']:
-                        set_volume(50.0)
-                    else:
-                        set_volume(100.0)
-            else:
-                print("Kein Text erkannt. Versuche es mit einer besseren Textdarstellung.")
-
-            # Visualisierung des erfassten Bereichs
-            cv2.imshow("Erfasster Bereich", cv_image)
-
-            # Verarbeitete Bilder anzeigen
-            cv2.imshow("Graustufen", processed_images["gray"])
-            cv2.imshow("Binär (Otsu)", processed_images["binary"])
-            cv2.imshow("Adaptiv", processed_images["adaptive"])
+            # OCR nur durchführen, wenn sich der Bereich seit dem letzten Frame verändert hat
+            if scheduler.frame_changed(cv_image):
+                results, processed_images = recognize_text(pil_image, cv_image, matcher,
+                                                           profile=SCREEN_REGION["profile"], buffers=buffers)
+
+                # Erkannten Text ausgeben
+                print("-" * 40)
+                if results:
+                    for result in results:
+                        print(f"Erkannter Text ({result['method']}): {result['text']}")
+                        # TODO: ÄNDERE LAUTSTÄRKE
+                        if 'row_2.pdf' in result['text']:
+                            set_volume(50.0)
+                        else:
+                            set_volume(100.0)
+                else:
+                    print("Kein Text erkannt. Versuche es mit einer besseren Textdarstellung.")
+
+                if first_decision:
+                    first_decision = False
+                    print(f"Zeit bis zur ersten Entscheidung: {(time.perf_counter() - _START_TIME) * 1000:.0f} ms")
+
+                # Visualisierung des erfassten Bereichs
+                cv2.imshow("Erfasster Bereich", cv_image)
+
+                # Verarbeitete Bilder anzeigen (entfällt bei Template-Treffern)
+                if processed_images is not None:
+                    cv2.imshow("Graustufen", processed_images["gray"])
+                    cv2.imshow("Binär (Otsu)", processed_images["binary"])
+                    cv2.imshow("Adaptiv", processed_images["adaptive"])
 
             # Warte auf Tastendruck, 'q' zum Beenden
-            if cv2.waitKey(2000) & 0xFF == ord('q'):
+            if cv2.waitKey(scheduler.wait_ms()) & 0xFF == ord('q'):
                 break
 
     except KeyboardInterrupt:
         print("Programm beendet")
+    except pytesseract.pytesseract.TesseractNotFoundError:
+        raise
     except Exception as e:
         print(f"Fehler im Hauptprogramm: {e}")
     finally:
+        print(scheduler.stats())
         cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.learn:
+        learn_template(args.learn, args.learn_image)
+        raise SystemExit(0)
+
+    template_matcher = TemplateMatcher() if args.templates else None
     try:
-        # Tesseract-Version überprüfen
-        print("Tesseract Version:", pytesseract.get_tesseract_version())
-        print("Verfügbare Sprachen:", pytesseract.get_languages())
-        main()
+        # Tesseract wird erst beim ersten OCR-Aufruf geprüft (ensure_tesseract)
+        if args.replay and args.profile == "alle":
+            compare_profiles(args.replay, args.labels)
+        elif args.replay:
+            run_replay(args.replay, args.labels, args.profile or SCREEN_REGION["profile"],
+                       matcher=template_matcher)
+        else:
+            main(template_matcher, PollingScheduler(args.min_interval, args.max_interval))
     except pytesseract.pytesseract.TesseractNotFoundError:
         print("FEHLER: Tesseract ist nicht installiert oder nicht im PATH.")
         print("Bitte installiere Tesseract OCR mit:\nbrew install tesseract\nbrew install tesseract-lang")
@@ -12,46 +12,604 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-import pandas as pd
 from fpdf import FPDF
+import argparse
+import codecs
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import cProfile
+import csv
+import hashlib
+import io
+import json
 import os
+import pstats
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
 
-def create_pdfs_from_csv(csv_file_path, output_folder):
+
+class PdfBuffer:
+    """Dokumentpuffer für FPDF, der Teilstücke in einer Liste sammelt.
+
+    fpdf 1.7.2 hängt jede Ausgabezeile per self.buffer += ... an einen String an, was bei
+    Dokumenten mit vielen Seiten quadratische Laufzeit hat. FPDF nutzt vom Puffer nur +=,
+    len() und encode(), die hier ohne Kopieren des bisherigen Inhalts auskommen.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+
+    def __iadd__(self, text):
+        self._parts.append(text)
+        self._length += len(text)
+        return self
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return "".join(self._parts)
+
+    def encode(self, *args, **kwargs):
+        return str(self).encode(*args, **kwargs)
+
+
+class PdfTemplate:
+    """Einmal vorbereitetes FPDF-Dokument (Seitenformat, Ränder, Schrift), aus dem pro Zeile
+    oder pro Stapel von Zeilen ein neues Dokument abgeleitet wird.
+
+    Einstellungen und Schriftmetriken werden nur einmal aufgebaut und von allen Dokumenten
+    geteilt; pro Zeile werden lediglich die dokumentbezogenen Puffer neu angelegt.
+    """
+
+    # Nur lesend genutzte Schriftdaten, die sich alle Dokumente teilen können
+    SHARED_ATTRIBUTES = ("core_fonts", "fonts", "font_files", "current_font")
+
+    def __init__(self, font="Arial", font_size=12, line_height=10):
+        prototype = FPDF()
+        prototype.set_font(font, size=font_size)
+        self.font = font
+        self.font_size = font_size
+        self.line_height = line_height
+        self._state = prototype.__dict__
+
+    def settings(self):
+        """Einstellungen, die das Aussehen jeder Seite bestimmen (für das Manifest)."""
+        return {"font": self.font, "font_size": self.font_size, "line_height": self.line_height}
+
+    def new_document(self):
+        pdf = FPDF.__new__(FPDF)
+        pdf.__dict__.update(self._state)
+        for name, value in self._state.items():
+            if name not in self.SHARED_ATTRIBUTES and isinstance(value, (dict, list)):
+                setattr(pdf, name, copy.copy(value))
+        pdf.buffer = PdfBuffer()
+        return pdf
+
+    def write_row(self, pdf, values):
+        """Schreibt eine Zeile ab einer neuen Seite; liefert (erste Seite, Anzahl Seiten).
+
+        Die Standardschriften kennen nur Latin-1; andere Zeichen werden als ? ausgegeben,
+        statt beim Speichern mit einem Kodierfehler abzubrechen.
+        """
+        pdf.add_page()
+        first_page = pdf.page
+        for value in values:
+            text = value.strip().encode("latin-1", "replace").decode("latin-1")
+            pdf.multi_cell(0, self.line_height, txt=text)
+        return first_page, pdf.page - first_page + 1
+
+
+# Kandidaten für Trennzeichen und Zeichenkodierung, jeweils in der Reihenfolge der Bevorzugung
+DELIMITERS = ";,\t|"
+ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+SNIFF_BYTES = 64 * 1024
+
+CsvFormat = collections.namedtuple("CsvFormat", "encoding delimiter quotechar")
+
+
+def sniff_format(csv_file_path, encoding=None, delimiter=None):
+    """Bestimmt Zeichenkodierung, Trennzeichen und Anführungszeichen anhand des Dateianfangs.
+
+    Als Kodierung gilt die erste aus ENCODINGS, mit der sich die Stichprobe dekodieren lässt.
+    Kann csv.Sniffer das Trennzeichen nicht bestimmen (z. B. bei unterschiedlich vielen
+    Spalten pro Zeile), wird das häufigste Zeichen aus DELIMITERS genommen, im Zweifel ;.
+    """
+    with open(csv_file_path, "rb") as file:
+        sample = file.read(SNIFF_BYTES)
+
+    text = None
+    for candidate in ([encoding] if encoding else ENCODINGS):
+        try:
+            # Ein am Ende abgeschnittenes Mehrbyte-Zeichen ist kein Dekodierfehler
+            text = codecs.getincrementaldecoder(candidate)().decode(sample, final=False)
+            encoding = candidate
+            break
+        except UnicodeDecodeError:
+            continue
+    if text is None:
+        raise UnicodeDecodeError(encoding, sample, 0, len(sample), "Kodierung passt nicht zur Datei")
+
+    quotechar = '"'
+    if delimiter is None:
+        try:
+            dialect = csv.Sniffer().sniff(text, delimiters=DELIMITERS)
+            delimiter, quotechar = dialect.delimiter, dialect.quotechar or '"'
+        except csv.Error:
+            delimiter = max(DELIMITERS, key=lambda d: (text.count(d), d == ";"))
+            if not text.count(delimiter):
+                delimiter = ";"
+    return CsvFormat(encoding, delimiter, quotechar)
+
+
+def _csv_reader(file, csv_format):
+    # Nur Trenn- und Anführungszeichen werden übernommen; verdoppelte Anführungszeichen
+    # innerhalb von Feldern gelten immer als Escape (RFC 4180)
+    return csv.reader(file, delimiter=csv_format.delimiter, quotechar=csv_format.quotechar, doublequote=True)
+
+
+def iter_rows(csv_file_path, csv_format=None, reader="csv", chunk_rows=50_000):
+    """Liest die CSV-Datei datensatzweise, ohne sie komplett in den Speicher zu laden.
+
+    Liefert (Datensatznummer ab 1, Werte als Tupel) ohne Einschränkung auf gleiche Spaltenanzahl.
+    Felder in Anführungszeichen dürfen Trennzeichen und Zeilenumbrüche enthalten. Mit reader
+    "pandas" wird in Blöcken von chunk_rows Datensätzen über pandas gelesen; kürzere Datensätze
+    werden dabei mit leeren Feldern auf die breiteste Zeile der Stichprobe aufgefüllt.
+    """
+    csv_format = csv_format or sniff_format(csv_file_path)
+    if reader == "pandas":
+        yield from _iter_rows_pandas(csv_file_path, csv_format, chunk_rows)
+        return
+
+    with open(csv_file_path, "r", encoding=csv_format.encoding, newline="") as file:
+        for index, values in enumerate(_csv_reader(file, csv_format), 1):
+            yield index, tuple(values)
+
+
+def _iter_rows_pandas(csv_file_path, csv_format, chunk_rows):
+    import pandas as pd
+
+    # pandas braucht die Spaltenzahl vorab; Datensätze mit mehr Feldern führen zu einem Fehler
+    with open(csv_file_path, "r", encoding=csv_format.encoding, newline="") as file:
+        sample = io.StringIO(file.read(SNIFF_BYTES))
+    width = max((len(values) for values in _csv_reader(sample, csv_format)), default=1)
+
+    chunks = pd.read_csv(csv_file_path, sep=csv_format.delimiter, quotechar=csv_format.quotechar,
+                         encoding=csv_format.encoding, header=None, names=range(width), dtype=str,
+                         keep_default_na=False, skip_blank_lines=False, chunksize=chunk_rows)
+    index = 0
+    with chunks:
+        for chunk in chunks:
+            for values in chunk.itertuples(index=False, name=None):
+                index += 1
+                yield index, values
+
+
+def iter_chunks(rows, chunk_size):
+    """Fasst Zeilen zu Arbeitspaketen zusammen, ohne mehr als ein Paket im Speicher zu halten.
+
+    Mit chunk_size None werden alle Zeilen zu einem Paket.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_rows(template, output_folder, rows, combined=False):
+    """Rendert ein Arbeitspaket.
+
+    Liefert pro geschriebener Datei (Pfad, [(Zeilennummer, erste Seite, Anzahl Seiten), ...]).
+    Ohne combined entsteht pro Zeile eine Datei row_N.pdf, sonst eine Datei für alle Zeilen.
+    """
+    if not combined:
+        written = []
+        for index, values in rows:
+            pdf = template.new_document()
+            first_page, page_count = template.write_row(pdf, values)
+
+            # Speichern der PDF mit einem eindeutigen Namen
+            pdf_file_path = os.path.join(output_folder, f"row_{index}.pdf")
+            pdf.output(pdf_file_path)
+            written.append((pdf_file_path, [(index, first_page, page_count)]))
+        return written
+
+    pdf = template.new_document()
+    pages = [(index, *template.write_row(pdf, values)) for index, values in rows]
+    pdf_file_path = os.path.join(output_folder, f"rows_{pages[0][0]}-{pages[-1][0]}.pdf")
+    pdf.output(pdf_file_path)
+    return [(pdf_file_path, pages)]
+
+
+class PageIndex:
+    """Zuordnung Zeilennummer -> (Datei, erste Seite, Anzahl Seiten) für zusammengefasste PDFs.
+
+    Endet der Pfad auf .json, wird eine JSON-Datei geschrieben, sonst eine SQLite-Datenbank mit
+    der Tabelle rows(row, file, page, pages). Die JSON-Datei wird fortlaufend geschrieben,
+    damit auch bei sehr vielen Zeilen nichts im Speicher gesammelt wird.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._json = path.lower().endswith(".json")
+        if self._json:
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write("{")
+            self._first = True
+        else:
+            if os.path.exists(path):
+                os.remove(path)
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE rows (row INTEGER PRIMARY KEY, file TEXT, page INTEGER, pages INTEGER)")
+
+    def add(self, pdf_file_path, pages):
+        file_name = os.path.basename(pdf_file_path)
+        if self._json:
+            for index, first_page, page_count in pages:
+                separator = "" if self._first else ","
+                entry = json.dumps({"file": file_name, "page": first_page, "pages": page_count})
+                self._file.write(f'{separator}\n  "{index}": {entry}')
+                self._first = False
+        else:
+            self._db.executemany("INSERT INTO rows VALUES (?, ?, ?, ?)",
+                                 ((index, file_name, first_page, page_count)
+                                  for index, first_page, page_count in pages))
+
+    def close(self):
+        if self._json:
+            self._file.write("\n}\n")
+            self._file.close()
+        else:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Vorlage pro Arbeitsprozess, wird beim ersten Paket angelegt
+_worker_template = None
+
+
+def _render_chunk(output_folder, rows, combined):
+    global _worker_template
+    if _worker_template is None:
+        _worker_template = PdfTemplate()
+    return render_rows(_worker_template, output_folder, rows, combined)
+
+
+def _render_parallel(chunks, output_folder, workers, combined):
+    # Höchstens zwei Pakete pro Prozess gleichzeitig in Arbeit, damit die Datei nicht
+    # schneller gelesen wird, als die Prozesse schreiben können
+    max_pending = 2 * workers
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunks:
+            pending.append(pool.submit(_render_chunk, output_folder, chunk, combined))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+MANIFEST_FILE = ".csv-to-pdf-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def output_name(rows, combined):
+    return f"rows_{rows[0][0]}-{rows[-1][0]}.pdf" if combined else f"row_{rows[0][0]}.pdf"
+
+
+def content_hash(rows):
+    digest = hashlib.sha1()
+    for _, values in rows:
+        digest.update("\x1f".join(values).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Merkt sich pro erzeugter Datei den Inhalts-Hash ihrer Zeilen und ihre Seitenaufteilung.
+
+    Beim nächsten Lauf werden Dateien mit unverändertem Hash übersprungen; Dateien aus dem
+    letzten Lauf, die nicht mehr entstehen würden, gelten als verwaist.
+    """
+
+    def __init__(self, output_folder, settings):
+        self.path = os.path.join(output_folder, MANIFEST_FILE)
+        self.output_folder = output_folder
+        self.settings = settings
+        self.previous = {}
+        self.files = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Geänderte Darstellung macht alle bisherigen Dateien ungültig
+            if data.get("version") == MANIFEST_VERSION and data.get("settings") == settings:
+                self.previous = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    def unchanged(self, file_name, digest):
+        entry = self.previous.get(file_name)
+        return (entry is not None and entry["hash"] == digest
+                and os.path.exists(os.path.join(self.output_folder, file_name)))
+
+    def record(self, file_name, digest, pages):
+        self.files[file_name] = {"hash": digest, "pages": [list(page) for page in pages]}
+
+    def pages(self, file_name):
+        return [tuple(page) for page in self.previous[file_name]["pages"]]
+
+    def remove_orphans(self):
+        orphans = [name for name in self.previous if name not in self.files]
+        for name in orphans:
+            try:
+                os.remove(os.path.join(self.output_folder, name))
+            except FileNotFoundError:
+                pass
+        return orphans
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "settings": self.settings, "files": self.files}, f)
+        os.replace(temp_path, self.path)
+
+
+def create_pdfs_from_csv(csv_file_path, output_folder, workers=1, chunk_size=200, rows_per_pdf=1,
+                         index_path=None, incremental=False, reader="csv", encoding=None, delimiter=None):
+    """Erzeugt PDF-Dateien aus den Zeilen einer CSV-Datei.
+
+    rows_per_pdf 1 erzeugt pro Zeile eine Datei row_N.pdf, ein größerer Wert fasst jeweils so
+    viele Zeilen (jede ab einer neuen Seite) zu rows_ERSTE-LETZTE.pdf zusammen, 0 schreibt alle
+    Zeilen in eine Datei. Mit index_path wird festgehalten, auf welcher Seite welche Zeile steht.
+
+    Mit workers > 1 werden Pakete von chunk_size Zeilen (bzw. je eine zusammengefasste Datei)
+    auf einen Prozesspool verteilt; die Fortschrittsmeldungen erscheinen trotzdem in
+    Zeilenreihenfolge. Eine einzelne Gesamtdatei wird immer in einem Prozess erzeugt.
+
+    Mit incremental wird im Ausgabeordner ein Manifest geführt: Dateien, deren Zeilen sich seit
+    dem letzten Lauf nicht geändert haben, werden übersprungen und Dateien gelöscht, die zu
+    keiner Zeile mehr gehören. Der erste inkrementelle Lauf erzeugt noch alle Dateien.
+
+    Kodierung und Trennzeichen werden einmal aus dem Dateianfang bestimmt, sofern sie nicht
+    über encoding und delimiter vorgegeben sind (siehe sniff_format).
+    """
     # Überprüfen, ob die CSV-Datei existiert
     if not os.path.exists(csv_file_path):
         print(f"Die Datei {csv_file_path} existiert nicht.")
         return
 
-        # Erstellen des Ausgabeverzeichnisses, falls es nicht existiert
-        if not os.path.exists(output_folder):
-            os.makedirs(output_folder)
+    # Erstellen des Ausgabeverzeichnisses, falls es nicht existiert
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
 
-        # Zeilenweise Einlesen der CSV-Datei ohne Einschränkung auf gleiche Spaltenanzahl
-        try:
-            with open(csv_file_path, "r", encoding="utf-8") as file:
-                lines = file.readlines()
-        except Exception as e:
-            print(f"Fehler beim Lesen der CSV-Datei: {e}")
-            return
+    combined = rows_per_pdf != 1
+    if combined:
+        chunk_size = rows_per_pdf or None
+    template = PdfTemplate()
+    manifest = Manifest(output_folder, template.settings()) if incremental else None
+    hashes = {}
+    skipped = 0
+
+    def pending_chunks(chunks):
+        # Unveränderte Dateien aus den Paketen entfernen, bevor sie gerendert werden
+        nonlocal skipped
+        for chunk in chunks:
+            if manifest is None:
+                yield chunk
+                continue
+            units = [chunk] if combined else [[row] for row in chunk]
+            rows = []
+            for unit in units:
+                file_name, digest = output_name(unit, combined), content_hash(unit)
+                if manifest.unchanged(file_name, digest):
+                    pages = manifest.pages(file_name)
+                    manifest.record(file_name, digest, pages)
+                    if index is not None:
+                        index.add(file_name, pages)
+                    skipped += 1
+                else:
+                    hashes[file_name] = digest
+                    rows.extend(unit)
+            if rows:
+                yield rows
 
+    index = PageIndex(index_path) if index_path else None
+    try:
         # Iterieren über jede Zeile der Datei
-        for index, line in enumerate(lines):
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
+        csv_format = sniff_format(csv_file_path, encoding, delimiter)
+        rows = iter_rows(csv_file_path, csv_format, reader)
+        chunks = pending_chunks(iter_chunks(rows, chunk_size))
+        if workers > 1 and rows_per_pdf != 0:
+            written = _render_parallel(chunks, output_folder, workers, combined)
+        else:
+            written = (entry for chunk in chunks for entry in render_rows(template, output_folder, chunk, combined))
+        for pdf_file_path, pages in written:
+            if manifest is not None:
+                file_name = os.path.basename(pdf_file_path)
+                manifest.record(file_name, hashes.pop(file_name), pages)
+            if index is not None:
+                index.add(pdf_file_path, pages)
+            print(f"PDF erstellt: {pdf_file_path}")
+    except (OSError, ValueError, LookupError, csv.Error, ImportError) as e:
+        # ValueError umfasst Dekodierfehler und Parserfehler von pandas
+        print(f"Fehler beim Verarbeiten der CSV-Datei: {e}")
+        return
+    finally:
+        if index is not None:
+            index.close()
 
-        # Entfernen von führenden/trailing Whitespaces und Hinzufügen zur PDF
-        line_content = line.strip()
-        values = line_content.split(';')  # Werte mit ; trennen
-        for value in values:
-            pdf.multi_cell(0, 10, txt=value.strip())
+    if manifest is not None:
+        orphans = manifest.remove_orphans()
+        manifest.save()
+        print(f"{skipped} unverändert übersprungen, {len(orphans)} verwaiste Datei(en) gelöscht")
+
+
+# Benchmark mit synthetischen CSV-Dateien
+
+BENCHMARK_WORDS = ("Mercedes", "Porsche", "Audi", "Ferrari", "Tesla", "Straße", "Kühler", "Öl", "Größe")
+BENCHMARK_UNICODE_WORDS = ("Ærøskøbing", "Łódź", "東京", "Αθήνα", "Київ", "🚗", "€")
+
+
+def generate_csv(path, rows, fields, field_length, unicode=False, seed=0):
+    """Schreibt eine synthetische CSV-Datei; jedes dritte Feld steht in Anführungszeichen und enthält ;."""
+    rng = random.Random(seed)
+    words = BENCHMARK_WORDS + (BENCHMARK_UNICODE_WORDS if unicode else ())
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        for row in range(rows):
+            values = []
+            for field in range(fields):
+                text = ""
+                while len(text) < field_length:
+                    text += rng.choice(words) + " "
+                text = text[:field_length].strip()
+                values.append(f"{text}; {row}" if field % 3 == 2 else text)
+            writer.writerow(values)
+    return os.path.getsize(path)
+
+
+def _output_size(folder):
+    return sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+
+
+def _run_quietly(csv_file_path, output_folder, **options):
+    if os.path.exists(output_folder):
+        shutil.rmtree(output_folder)
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_pdfs_from_csv(csv_file_path, output_folder, **options)
+
+
+def profile_breakdown(csv_file_path, output_folder, **options):
+    """Aufteilung der Laufzeit auf Einlesen, Textsatz (multi_cell) und Speichern (pdf.output)."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    _run_quietly(csv_file_path, output_folder, **options)
+    profiler.disable()
+    stats = pstats.Stats(profiler).stats
+    total = sum(inline_time for _, _, inline_time, _, _ in stats.values())
+
+    def cumulative(function_names):
+        return sum(entry[3] for (_, _, name), entry in stats.items() if name in function_names)
+
+    parts = {
+        "Einlesen": cumulative({"iter_rows"}),
+        "multi_cell": cumulative({"multi_cell"}),
+        "pdf.output": cumulative({"output"}),
+    }
+    parts["Sonstiges"] = max(total - sum(parts.values()), 0.0)
+    return total, parts
+
+
+def run_benchmark(row_counts=(1000, 5000), field_counts=(5,), field_lengths=(20, 200), workers=None):
+    """Misst Durchsatz, geschriebene Bytes und Spitzenspeicher für alle Ausgabemodi.
+
+    Der Spitzenspeicher stammt aus einem eigenen Lauf mit tracemalloc (Python-Heap des
+    Hauptprozesses), weil tracemalloc die Laufzeit um ein Vielfaches verlängert.
+    """
+    workers = workers or os.cpu_count() or 1
+    modes = [
+        ("eine Datei pro Zeile", {}),
+        (f"parallel (Prozesse: {workers})", {"workers": workers}),
+        ("1000 Zeilen pro Datei", {"rows_per_pdf": 1000}),
+        ("eine Gesamtdatei", {"rows_per_pdf": 0}),
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_folder = os.path.join(temp_dir, "out")
+        largest = None
+        for rows in row_counts:
+            for fields in field_counts:
+                for field_length in field_lengths:
+                    for unicode in (False, True):
+                        csv_file_path = os.path.join(temp_dir, f"bench_{rows}_{fields}_{field_length}_{unicode}.csv")
+                        csv_bytes = generate_csv(csv_file_path, rows, fields, field_length, unicode)
+                        largest = max(largest or (0, ""), (csv_bytes, csv_file_path))
+                        print(f"\n{rows} Zeilen, {fields} Felder à {field_length} Zeichen"
+                              f"{', mit Unicode' if unicode else ''} ({csv_bytes / 1024:.0f} KiB CSV)")
+                        for label, options in modes:
+                            start = time.perf_counter()
+                            _run_quietly(csv_file_path, output_folder, **options)
+                            elapsed = time.perf_counter() - start
+                            written = _output_size(output_folder)
+
+                            tracemalloc.start()
+                            _run_quietly(csv_file_path, output_folder, **options)
+                            peak = tracemalloc.get_traced_memory()[1]
+                            tracemalloc.stop()
+                            print(f"  {label:<24} {rows / elapsed:>9,.0f} Zeilen/s  {written / 1024 ** 2:>8.1f} MiB "
+                                  f"geschrieben  Spitzenspeicher {peak / 1024 ** 2:.1f} MiB")
+
+        for label, options in (modes[0], modes[3]):
+            total, parts = profile_breakdown(largest[1], output_folder, **options)
+            print(f"\nProfil {label} ({os.path.basename(largest[1])}, {total:.2f} s unter cProfile):")
+            for name, seconds in parts.items():
+                print(f"  {name:<12} {seconds:>7.2f} s  {seconds / total:>6.1%}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Erzeugt aus jeder Zeile einer CSV-Datei eine PDF-Datei")
+    parser.add_argument("csv_file", nargs="?", default="beispiel.csv", help="Pfad zur CSV-Datei (Standard: beispiel.csv)")
+    parser.add_argument("output_dir", nargs="?", default="output_pdfs",
+                        help="Ordner, in dem die PDFs gespeichert werden sollen (Standard: output_pdfs)")
+    parser.add_argument("--workers", type=int,
+                        help="Anzahl Prozesse; 0 verwendet alle CPU-Kerne (Standard: 1, Benchmark: alle)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Zeilen pro Arbeitspaket (Standard: 200)")
+    parser.add_argument("--rows-per-pdf", type=int, default=1, metavar="N",
+                        help="Zeilen pro PDF-Datei; 0 schreibt alle Zeilen in eine Datei (Standard: 1). "
+                             "Eine Datei wird bis zum Speichern komplett im Speicher aufgebaut")
+    parser.add_argument("--index", metavar="PFAD",
+                        help="Seitenindex Zeile -> Datei/Seite schreiben (.json, sonst SQLite)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Nur geänderte Zeilen neu erzeugen und verwaiste Dateien löschen "
+                             f"(anhand von {MANIFEST_FILE} im Ausgabeordner)")
+    parser.add_argument("--reader", choices=("csv", "pandas"), default="csv",
+                        help="Leser für die Datei; pandas liest in großen Blöcken und erwartet höchstens "
+                             "so viele Spalten wie die breiteste Zeile am Dateianfang (Standard: csv)")
+    parser.add_argument("--encoding", help="Zeichenkodierung vorgeben statt sie zu erkennen, z. B. cp1252")
+    parser.add_argument("--delimiter", help="Trennzeichen vorgeben statt es zu erkennen, z. B. ;")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Durchsatz der Ausgabemodi mit synthetischen CSV-Dateien messen")
+    parser.add_argument("--bench-rows", type=int, nargs="+", default=[1000, 5000], metavar="N",
+                        help="Zeilenzahlen für den Benchmark (Standard: 1000 5000)")
+    parser.add_argument("--bench-fields", type=int, nargs="+", default=[5], metavar="N",
+                        help="Felder pro Zeile für den Benchmark (Standard: 5)")
+    parser.add_argument("--bench-length", type=int, nargs="+", default=[20, 200], metavar="N",
+                        help="Zeichen pro Feld für den Benchmark (Standard: 20 200)")
+    args = parser.parse_args()
+    if args.delimiter is not None and len(args.delimiter) != 1:
+        parser.error("--delimiter muss genau ein Zeichen sein")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size muss mindestens 1 sein")
+    if args.workers is not None and args.workers < 0:
+        parser.error("--workers darf nicht negativ sein")
+    if args.rows_per_pdf < 0:
+        parser.error("--rows-per-pdf darf nicht negativ sein")
+    return args
 
-        # Speichern der PDF mit einem eindeutigen Namen
-        pdf_file_path = os.path.join(output_folder, f"row_{index + 1}.pdf")
-        pdf.output(pdf_file_path)
-        print(f"PDF erstellt: {pdf_file_path}")
 
-# Beispielaufruf der Funktion
-csv_file = "beispiel.csv"  # Pfad zur CSV-Datei
-output_dir = "output_pdfs"  # Ordner, in dem die PDFs gespeichert werden sollen
-create_pdfs_from_csv(csv_file, output_dir)
+if __name__ == "__main__":
+    args = parse_args()
+    if args.benchmark:
+        run_benchmark(args.bench_rows, args.bench_fields, args.bench_length, args.workers or None)
+        sys.exit()
+    workers = 1 if args.workers is None else args.workers or os.cpu_count() or 1
+    create_pdfs_from_csv(args.csv_file, args.output_dir, workers, args.chunk_size,
+                         args.rows_per_pdf, args.index, args.incremental, args.reader, args.encoding,
+                         args.delimiter)
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+
+#  Copyright (C) 2025 Martin Pfeffer
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import secrets
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Fehlertypen der Hue API v1
+ERROR_UNAUTHORIZED = 1
+ERROR_RESOURCE_NOT_AVAILABLE = 3
+ERROR_LINK_BUTTON_NOT_PRESSED = 101
+ERROR_INTERNAL = 901
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed"}
+
+EVENTSTREAM_PATH = "/eventstream/clip/v2"
+
+
+def _error(error_type, address, description):
+    return [{"error": {"type": error_type, "address": address, "description": description}}]
+
+
+class HueBridgeEmulator:
+    """Lokale Nachbildung einer Hue Bridge (API v1) für Tests und Lastmessungen ohne echte Hardware.
+
+    Unterstützt /api (Pairing), /api/config sowie Lichter und Gruppen unter /api/<user>/.
+    Latenz, Link-Button-Zustand und ein Befehlslimit pro Sekunde sind einstellbar. Änderungen
+    an Lichtern werden wie bei der echten Bridge als Server-Sent Events unter
+    /eventstream/clip/v2 veröffentlicht (abschaltbar mit eventstream=False).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, link_button=False, light_count=10,
+                 command_limit=None, bridge_id="001788FFFE00E1A0", eventstream=True):
+        self.host = host
+        self.eventstream = eventstream
+        self._event_queues = set()
+        self.port = port
+        self.latency = latency
+        self.command_limit = command_limit
+        self.link_button_until = float("inf") if link_button else 0.0
+        self.users = set()
+        self.config = {
+            "name": "Hue Emulator",
+            "bridgeid": bridge_id,
+            "mac": ":".join(bridge_id[i:i + 2] for i in (0, 2, 4, 10, 12, 14)).lower(),
+            "modelid": "BSB002",
+            "apiversion": "1.60.0",
+            "swversion": "1960000000",
+            "datastoreversion": "160",
+            "factorynew": False
+        }
+        self.lights = {
+            str(i): {"name": f"Licht {i}", "type": "Extended color light", "modelid": "LCT015",
+                     "state": {"on": False, "bri": 254, "hue": 0, "sat": 0, "ct": 366, "reachable": True}}
+            for i in range(1, light_count + 1)
+        }
+        self.groups = {}
+        self.request_count = 0
+        self.command_count = 0
+        self._command_times = []
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    # Link-Button
+
+    def press_link_button(self, duration=30):
+        """Simuliert einen Druck auf den Link-Button; neue Benutzer sind duration Sekunden lang erlaubt."""
+        self.link_button_until = time.monotonic() + duration
+
+    def release_link_button(self):
+        self.link_button_until = 0.0
+
+    @property
+    def link_button_pressed(self):
+        return time.monotonic() < self.link_button_until
+
+    # Routing
+
+    def _create_user(self, body):
+        if not isinstance(body, dict) or "devicetype" not in body:
+            return _error(5, "/", "invalid/missing parameters in body")
+        if not self.link_button_pressed:
+            return _error(ERROR_LINK_BUTTON_NOT_PRESSED, "", "link button not pressed")
+        username = secrets.token_hex(20)
+        self.users.add(username)
+        return [{"success": {"username": username}}]
+
+    def _command_allowed(self):
+        # Wie die echte Bridge: Befehle über dem Limit werden verworfen
+        self.command_count += 1
+        if self.command_limit is None:
+            return True
+        now = time.monotonic()
+        self._command_times = [sent for sent in self._command_times if now - sent < 1.0]
+        if len(self._command_times) >= self.command_limit:
+            return False
+        self._command_times.append(now)
+        return True
+
+    def _update_state(self, target, state, address):
+        if not isinstance(state, dict):
+            return _error(2, address, "body contains invalid json")
+        if not self._command_allowed():
+            return _error(ERROR_INTERNAL, address, "Internal error, 503")
+        target.update(state)
+        return [{"success": {f"{address}/{key}": value}} for key, value in state.items()]
+
+    def handle(self, method, path, body):
+        """Beantwortet eine API-Anfrage; liefert (HTTP-Status, JSON-Nutzlast)."""
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if not parts or parts[0] != "api":
+            return 404, _error(ERROR_RESOURCE_NOT_AVAILABLE, path, f"resource, {path}, not available")
+
+        if len(parts) == 1:
+            if method == "POST":
+                return 200, self._create_user(body)
+            return 405, _error(4, path, "method not available")
+
+        if parts[1] == "config" and len(parts) == 2:
+            return 200, self.config
+
+        username, resource = parts[1], parts[2:]
+        if username not in self.users:
+            return 200, _error(ERROR_UNAUTHORIZED, "/" + "/".join(resource), "unauthorized user")
+        address = "/" + "/".join(resource)
+
+        if not resource:
+            return 200, {"lights": self.lights, "groups": self.groups, "config": self.config}
+        if resource == ["config"]:
+            return 200, self.config
+        if resource == ["lights"] and method == "GET":
+            return 200, self.lights
+        if resource == ["groups"] and method == "GET":
+            return 200, self.groups
+        if len(resource) == 2 and resource[0] == "lights" and method == "GET" and resource[1] in self.lights:
+            return 200, self.lights[resource[1]]
+        if len(resource) == 3 and resource[0] == "lights" and resource[2] == "state" and method == "PUT":
+            if resource[1] not in self.lights:
+                return 200, _error(ERROR_RESOURCE_NOT_AVAILABLE, address, f"resource, {address}, not available")
+            result = self._update_state(self.lights[resource[1]]["state"], body, f"/lights/{resource[1]}/state")
+            if "success" in result[0]:
+                self._publish_light_update(resource[1], body)
+            return 200, result
+        if len(resource) == 3 and resource[0] == "groups" and resource[2] == "action" and method == "PUT":
+            group_id = resource[1]
+            if group_id != "0" and group_id not in self.groups:
+                return 200, _error(ERROR_RESOURCE_NOT_AVAILABLE, address, f"resource, {address}, not available")
+            light_ids = self.lights if group_id == "0" else self.groups[group_id]["lights"]
+            result = self._update_state({}, body, f"/groups/{group_id}/action")
+            if "success" in result[0]:
+                for light_id in light_ids:
+                    self.lights[light_id]["state"].update(body)
+                    self._publish_light_update(light_id, body)
+            return 200, result
+
+        return 200, _error(ERROR_RESOURCE_NOT_AVAILABLE, address, f"resource, {address}, not available")
+
+    # Event-Stream (API v2)
+
+    @staticmethod
+    def light_resource_id(light_id):
+        """Stabile v2-Ressourcen-ID eines Lichts."""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"hue-emulator/lights/{light_id}"))
+
+    def _publish_light_update(self, light_id, state):
+        # v1-Zustand in das v2-Format der Event-Stream-Nachrichten übersetzen
+        data = {"id": self.light_resource_id(light_id), "id_v1": f"/lights/{light_id}", "type": "light"}
+        if "on" in state:
+            data["on"] = {"on": state["on"]}
+        if "bri" in state:
+            data["dimming"] = {"brightness": round(state["bri"] / 2.54, 2)}
+        if "ct" in state:
+            data["color_temperature"] = {"mirek": state["ct"]}
+        if "xy" in state:
+            data["color"] = {"xy": {"x": state["xy"][0], "y": state["xy"][1]}}
+
+        event = {
+            "creationtime": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "data": [data],
+            "id": str(uuid.uuid4()),
+            "type": "update"
+        }
+        for queue in self._event_queues:
+            queue.put_nowait(event)
+
+    async def _stream_events(self, writer, headers):
+        if not self.eventstream:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+        if headers.get("hue-application-key") not in self.users:
+            writer.write(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        queue = asyncio.Queue()
+        self._event_queues.add(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n: hi\n\n")
+            await writer.drain()
+            while True:
+                event = await queue.get()
+                writer.write(f"id: {event['id']}\ndata: {json.dumps([event])}\n\n".encode())
+                await writer.drain()
+        finally:
+            self._event_queues.discard(queue)
+
+    # HTTP
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                raw_body = await reader.readexactly(int(headers.get("content-length", 0)))
+                try:
+                    body = json.loads(raw_body) if raw_body else None
+                except ValueError:
+                    body = None
+
+                self.request_count += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if method == "GET" and path.split("?")[0] == EVENTSTREAM_PATH:
+                    await self._stream_events(writer, headers)
+                    break
+                status, payload = self.handle(method, path, body)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                data = json.dumps(payload).encode()
+                writer.write((f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                              f"Content-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Abgebrochene Verbindungen, auch beim Beenden des Emulators, sind kein Fehler
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    @property
+    def address(self):
+        """Adresse im Format, das advanced-hue-connect.py als IP akzeptiert."""
+        return f"{self.host}:{self.port}"
+
+    def start_in_thread(self):
+        """Startet den Server in einem eigenen Thread mit eigener Event-Loop (für synchrone Clients)."""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            # Offene Keep-Alive-Verbindungen beenden, bevor die Loop geschlossen wird
+            self._server.close()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.address
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+
+def load_hue_tool():
+    """Lädt advanced-hue-connect.py aus demselben Verzeichnis als Modul."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "advanced-hue-connect.py")
+    spec = importlib.util.spec_from_file_location("advanced_hue_connect", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_benchmark(latency=0.005, rounds=5, button_delay=0.5, commands=200, light_count=50):
+    """Misst Pairing-Dauer und Befehlsdurchsatz von advanced-hue-connect.py gegen den Emulator."""
+    hue = load_hue_tool()
+    emulator = HueBridgeEmulator(latency=latency, light_count=light_count)
+    address = emulator.start_in_thread()
+    print(f"Emulator läuft unter {address} (Latenz {latency * 1000:.1f} ms)")
+
+    try:
+        # Pairing: der Link-Button wird erst nach button_delay Sekunden gedrückt
+        pairing_times = []
+        username = None
+        for _ in range(rounds):
+            emulator.release_link_button()
+            threading.Timer(button_delay, emulator.press_link_button).start()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                username = hue.pair_bridge(address)
+            pairing_times.append(time.perf_counter() - start)
+            if not username:
+                print("Pairing fehlgeschlagen")
+                return
+        print(f"Pairing (Button nach {button_delay:.1f} s): "
+              f"Mittel {statistics.mean(pairing_times):.3f} s, Max {max(pairing_times):.3f} s")
+
+        # Rohdurchsatz der gemeinsamen Session ohne Ratenbegrenzung
+        start = time.perf_counter()
+        for i in range(commands):
+            light_id = str(i % light_count + 1)
+            hue.session.put(f"http://{address}/api/{username}/lights/{light_id}/state",
+                            json={"bri": i % 254}, timeout=5)
+        elapsed = time.perf_counter() - start
+        print(f"Session-Durchsatz: {commands / elapsed:.0f} Befehle/s ({commands} Befehle)")
+
+        # Szene über die Befehlswarteschlange: gleiche Zustände werden zu einem Gruppenbefehl
+        scene = {"lights": {light_id: {"on": True, "bri": 200} for light_id in emulator.lights}}
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            hue.apply_scene(address, username, scene)
+        print(f"Szene für {light_count} Lichter: {time.perf_counter() - start:.3f} s, "
+              f"{emulator.command_count - commands} Befehl(e) an die Bridge")
+        print(f"Anfragen insgesamt: {emulator.request_count}")
+    finally:
+        emulator.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hue Bridge Emulator für Offline-Tests und Lastmessungen")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse, an die der Server gebunden wird")
+    parser.add_argument("--port", type=int, default=8080, help="Port (Standard: 8080)")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SEK",
+                        help="Künstliche Antwortverzögerung pro Anfrage")
+    parser.add_argument("--lights", type=int, help="Anzahl simulierter Lichter (Standard: 10, Benchmark: 50)")
+    parser.add_argument("--link-button", action="store_true",
+                        help="Link-Button dauerhaft gedrückt (sonst Fehler 101 beim Pairing)")
+    parser.add_argument("--command-limit", type=int, metavar="N",
+                        help="Befehle pro Sekunde, darüber Fehler 901 wie bei einer überlasteten Bridge")
+    parser.add_argument("--no-eventstream", action="store_true",
+                        help=f"{EVENTSTREAM_PATH} deaktivieren (Clients müssen pollen)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Pairing und Befehlsdurchsatz von advanced-hue-connect.py messen")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.benchmark:
+        run_benchmark(latency=args.latency or 0.005, light_count=args.lights or 50)
+        return
+
+    emulator = HueBridgeEmulator(args.host, args.port, args.latency, args.link_button, args.lights or 10,
+                                 args.command_limit, eventstream=not args.no_eventstream)
+    address = emulator.start_in_thread()
+    print(f"Hue Bridge Emulator läuft unter http://{address}/api")
+    print("Enter drückt den Link-Button für 30 Sekunden, Strg+C beendet.")
+    try:
+        while True:
+            input()
+            emulator.press_link_button()
+            print("Link-Button gedrückt")
+    except (KeyboardInterrupt, EOFError):
+        print("Emulator beendet")
+    finally:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
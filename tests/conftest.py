@@ -0,0 +1,23 @@
+import importlib.util
+import os
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def load_script():
+    """Lädt ein Skript aus dem Repository als Modul (auch mit Bindestrich im Dateinamen)."""
+    modules = {}
+
+    def _load(file_name):
+        if file_name not in modules:
+            module_name = os.path.splitext(file_name)[0].replace("-", "_")
+            spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_ROOT, file_name))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            modules[file_name] = module
+        return modules[file_name]
+
+    return _load
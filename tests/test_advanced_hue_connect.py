@@ -0,0 +1,316 @@
+import asyncio
+import errno
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+BRIDGE_CONFIG = {"name": "Philips hue", "bridgeid": "001788FFFE000001", "mac": "00:17:88:00:00:01"}
+
+
+@pytest.fixture(scope="module")
+def hue(load_script):
+    return load_script("advanced-hue-connect.py")
+
+
+class _ConfigHandler(BaseHTTPRequestHandler):
+    payload = None
+
+    def do_GET(self):
+        if self.path != "/api/config" or self.payload is None:
+            self.send_error(404)
+            return
+        body = json.dumps(self.payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(host, port, payload):
+    handler = type("Handler", (_ConfigHandler,), {"payload": payload})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def stand_in_servers():
+    # Bridge auf 127.0.0.2, fremder Webserver auf 127.0.0.3, beide auf demselben Port
+    bridge = _serve("127.0.0.2", 0, BRIDGE_CONFIG)
+    port = bridge.server_address[1]
+    try:
+        other = _serve("127.0.0.3", port, None)
+    except OSError:
+        bridge.shutdown()
+        pytest.skip("127.0.0.3 nicht verfügbar")
+    yield port
+    bridge.shutdown()
+    other.shutdown()
+
+
+def test_discover_finds_only_bridges(hue, stand_in_servers):
+    bridges = hue.discover_bridges("127.0.0.0/29", ports=(stand_in_servers,), timeout=0.5)
+
+    assert [bridge["ip"] for bridge in bridges] == ["127.0.0.2"]
+    assert bridges[0]["port"] == stand_in_servers
+    assert bridges[0]["config"]["bridgeid"] == BRIDGE_CONFIG["bridgeid"]
+
+
+def test_discover_sweeps_subnet_concurrently(hue, monkeypatch):
+    # Statt die Laufzeit zu messen, wird gezählt, wie viele Prüfungen gleichzeitig offen sind
+    state = {"open": 0, "max_open": 0, "probes": 0}
+
+    async def fake_probe(ip, port, timeout):
+        state["open"] += 1
+        state["probes"] += 1
+        state["max_open"] = max(state["max_open"], state["open"])
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            state["open"] -= 1
+        return None
+
+    monkeypatch.setattr(hue, "_probe_bridge", fake_probe)
+    bridges = asyncio.run(hue.discover_bridges_async("127.0.1.0/24", ports=(80, 443), concurrency=128))
+
+    assert bridges == []
+    assert state["probes"] == 254 * 2
+    assert state["max_open"] == 128
+
+
+def test_default_concurrency_respects_open_file_limit(hue, monkeypatch):
+    if hue.resource is None:
+        pytest.skip("resource-Modul nicht verfügbar")
+    monkeypatch.setattr(hue.resource, "getrlimit", lambda which: (256, 10240))
+    assert hue.default_concurrency() == 256 - hue.FD_HEADROOM
+    monkeypatch.setattr(hue.resource, "getrlimit", lambda which: (1 << 20, 1 << 20))
+    assert hue.default_concurrency() == hue.MAX_DISCOVERY_CONCURRENCY
+
+
+def test_discover_backs_off_when_file_descriptors_run_out(hue, monkeypatch, capsys):
+    # Höchstens 20 Verbindungen gleichzeitig möglich, darüber schlägt connect mit EMFILE fehl
+    state = {"open": 0, "max_open": 0}
+
+    async def fake_probe(ip, port, timeout):
+        if state["open"] >= 20:
+            raise OSError(errno.EMFILE, "Too many open files")
+        state["open"] += 1
+        state["max_open"] = max(state["max_open"], state["open"])
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            state["open"] -= 1
+        return BRIDGE_CONFIG if ip == "10.0.0.77" else None
+
+    monkeypatch.setattr(hue, "_probe_bridge", fake_probe)
+    bridges = asyncio.run(hue.discover_bridges_async("10.0.0.0/24", ports=(80,), concurrency=64))
+
+    assert [bridge["ip"] for bridge in bridges] == ["10.0.0.77"]
+    assert state["max_open"] <= 20
+    output = capsys.readouterr().out
+    assert "Zu viele offene Dateien" in output
+    assert "nicht geprüft werden" not in output
+
+
+class _PairingHandler(BaseHTTPRequestHandler):
+    # Der Link-Button gilt erst ab der dritten Anfrage als gedrückt
+    protocol_version = "HTTP/1.1"
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            type(self).requests_seen += 1
+            pressed = self.requests_seen >= 3
+        if pressed:
+            payload = [{"success": {"username": "neuer-key"}}]
+        else:
+            payload = [{"error": {"type": 101, "address": "", "description": "link button not pressed"}}]
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_pair_bridge_returns_first_username_and_stops_others(hue):
+    handler = type("Handler", (_PairingHandler,), {"requests_seen": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        username = hue.pair_bridge(f"127.0.0.1:{server.server_address[1]}", window=30)
+        seen = handler.requests_seen
+        # Den übrigen Methoden Gelegenheit geben, (fälschlich) weiter anzufragen
+        time.sleep(0.5)
+    finally:
+        server.shutdown()
+
+    assert username == "neuer-key"
+    # Die dritte Anfrage war erfolgreich, ohne dass eine Methode ihr Abfrageintervall abwarten musste
+    assert seen == 3
+    # Nach dem Erfolg schicken die übrigen Methoden keine weiteren Anfragen
+    assert handler.requests_seen == 3
+
+
+class _LightsHandler(BaseHTTPRequestHandler):
+    paths = []
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        if self.path == "/api/gueltig/lights":
+            payload = {"1": {"name": "Flur", "state": {"on": True}}}
+        else:
+            payload = [{"error": {"type": 1, "address": "/lights", "description": "unauthorized user"}}]
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def lights_bridge():
+    handler = type("Handler", (_LightsHandler,), {"paths": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}", handler.paths
+    server.shutdown()
+
+
+def test_stored_username_validated_with_single_request(hue, lights_bridge, tmp_path):
+    ip, paths = lights_bridge
+    path = str(tmp_path / "credentials.json")
+    hue.store_username(ip, BRIDGE_CONFIG, "gueltig", path)
+
+    assert hue.connect_with_stored_username(ip, path=path) == "gueltig"
+    assert paths == ["/api/gueltig/lights"]
+    # Nach IP-Wechsel wird der Key über die Bridge-ID gefunden
+    assert hue.find_stored_username("10.0.0.99", BRIDGE_CONFIG, path) == ("001788FFFE000001", "gueltig")
+
+
+def test_invalid_stored_username_is_forgotten(hue, lights_bridge, tmp_path):
+    ip, _ = lights_bridge
+    path = str(tmp_path / "credentials.json")
+    hue.store_username(ip, BRIDGE_CONFIG, "abgelaufen", path)
+
+    assert hue.connect_with_stored_username(ip, BRIDGE_CONFIG, path) is None
+    assert hue.load_credentials(path) == {}
+
+
+def test_stored_username_survives_unreachable_bridge(hue, tmp_path):
+    # Freien Port ermitteln, auf dem danach niemand lauscht
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        ip = f"127.0.0.1:{sock.getsockname()[1]}"
+    path = str(tmp_path / "credentials.json")
+    hue.store_username(ip, BRIDGE_CONFIG, "gueltig", path)
+
+    assert hue.connect_with_stored_username(ip, BRIDGE_CONFIG, path) is None
+    assert hue.find_stored_username(ip, BRIDGE_CONFIG, path) == ("001788FFFE000001", "gueltig")
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    puts = []
+    lights = {str(i): {"name": f"Licht {i}"} for i in range(1, 7)}
+    groups = {"1": {"name": "Wohnzimmer", "lights": ["1", "2", "3"]},
+              "2": {"name": "Küche", "lights": ["4", "5"]}}
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(self.groups if self.path.endswith("/groups") else self.lights)
+
+    def do_PUT(self):
+        state = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.puts.append((self.path, state, time.monotonic()))
+        self._reply([{"success": {f"{self.path}/{key}": value}} for key, value in state.items()])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def control_bridge():
+    handler = type("Handler", (_ControlHandler,), {"puts": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"127.0.0.1:{server.server_address[1]}", handler.puts
+    server.shutdown()
+
+
+def test_queue_coalesces_updates_to_same_light(hue, control_bridge):
+    ip, puts = control_bridge
+    queue = hue.LightCommandQueue(ip, "key", rate=50)
+    queue.set_light(1, {"on": True, "bri": 10})
+    queue.set_light(1, {"bri": 200})
+    queue.set_light(6, {"on": False})
+
+    assert queue.flush() == 0
+    assert [(path, state) for path, state, _ in puts] == [
+        ("/api/key/lights/1/state", {"on": True, "bri": 200}),
+        ("/api/key/lights/6/state", {"on": False}),
+    ]
+
+
+def test_queue_prefers_group_actions_for_identical_states(hue, control_bridge):
+    ip, puts = control_bridge
+    queue = hue.LightCommandQueue(ip, "key", rate=50, group_rate=20)
+    for light_id in ("1", "2", "3", "4"):
+        queue.set_light(light_id, {"on": True, "bri": 254})
+    queue.set_light("5", {"on": False})
+
+    assert queue.flush() == 0
+    sent = sorted((path, json.dumps(state, sort_keys=True)) for path, state, _ in puts)
+    assert sent == sorted([
+        ("/api/key/groups/1/action", json.dumps({"bri": 254, "on": True}, sort_keys=True)),
+        ("/api/key/lights/4/state", json.dumps({"bri": 254, "on": True}, sort_keys=True)),
+        ("/api/key/lights/5/state", json.dumps({"on": False})),
+    ])
+
+
+def test_queue_uses_group_zero_when_all_lights_match(hue, control_bridge):
+    ip, puts = control_bridge
+    queue = hue.LightCommandQueue(ip, "key", rate=50, group_rate=20)
+    for light_id in range(1, 7):
+        queue.set_light(light_id, {"on": False})
+
+    queue.flush()
+    assert [path for path, _, _ in puts] == ["/api/key/groups/0/action"]
+
+
+def test_queue_respects_rate_limit(hue, control_bridge):
+    ip, puts = control_bridge
+    queue = hue.LightCommandQueue(ip, "key", rate=20)
+    for light_id in range(1, 7):
+        queue.set_light(light_id, {"bri": light_id})
+
+    queue.flush()
+    times = [sent_at for _, _, sent_at in puts]
+    assert len(times) == 6
+    assert min(b - a for a, b in zip(times, times[1:])) > 0.04
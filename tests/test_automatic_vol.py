@@ -0,0 +1,151 @@
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+ImageFont = pytest.importorskip("PIL.ImageFont")
+Image = pytest.importorskip("PIL.Image")
+
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+@pytest.fixture(scope="module")
+def vol(load_script):
+    return load_script("automatic_vol.py")
+
+
+def render(text, size):
+    # Text wie im 100x30-Bildschirmbereich rendern
+    try:
+        font = ImageFont.truetype(FONT_PATH, size)
+    except OSError:
+        font = ImageFont.load_default(size)
+    image = Image.new("RGB", (100, 30), (255, 255, 255))
+    ImageDraw.Draw(image).text((3, 5), text, font=font, fill=(0, 0, 0))
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+
+@pytest.mark.parametrize("size", [10, 11, 12, 13, 14])
+def test_template_rejects_near_miss_strings(vol, tmp_path, size):
+    matcher = vol.TemplateMatcher(str(tmp_path))
+    matcher.learn("row_2.pdf", render("row_2.pdf", size))
+
+    for other in ("row_3.pdf", "row_1.pdf", "row_8.pdf"):
+        text, _ = matcher.match(render(other, size))
+        assert text is None, other
+
+
+@pytest.mark.parametrize("size", [10, 12, 14])
+def test_template_accepts_same_string_with_noise(vol, tmp_path, size):
+    matcher = vol.TemplateMatcher(str(tmp_path))
+    frame = render("row_2.pdf", size)
+    matcher.learn("row_2.pdf", frame)
+
+    assert matcher.match(frame) == ("row_2.pdf", 1.0)
+    noise = np.random.default_rng(size).integers(-3, 4, frame.shape)
+    noisy = np.clip(frame.astype(int) + noise, 0, 255).astype(np.uint8)
+    assert matcher.match(noisy)[0] == "row_2.pdf"
+
+
+def test_learn_rejects_uniform_region(vol, tmp_path):
+    matcher = vol.TemplateMatcher(str(tmp_path))
+    with pytest.raises(ValueError):
+        matcher.learn("leer", np.full((30, 100, 3), 255, dtype=np.uint8))
+
+    matcher.learn("row_2.pdf", render("row_2.pdf", 12))
+    reloaded = vol.TemplateMatcher(str(tmp_path))
+    assert [text for text, _ in reloaded.templates] == ["row_2.pdf"]
+
+
+@pytest.mark.parametrize("size", [10, 11, 12, 13, 14])
+def test_scheduler_detects_single_character_change(vol, size):
+    scheduler = vol.PollingScheduler(0.5, 8.0)
+    assert scheduler.frame_changed(render("row_2.pdf", size))
+    assert not scheduler.frame_changed(render("row_2.pdf", size))
+    assert scheduler.interval == 1.0
+
+    assert scheduler.frame_changed(render("row_3.pdf", size))
+    assert scheduler.interval == 0.5
+    assert scheduler.stats() == "Frames erfasst: 3, davon mit OCR verarbeitet: 2"
+
+
+def test_scheduler_backs_off_to_max_interval(vol):
+    scheduler = vol.PollingScheduler(0.5, 3.0)
+    frame = render("row_2.pdf", 12)
+    waits = []
+    for _ in range(5):
+        scheduler.frame_changed(frame)
+        waits.append(scheduler.wait_ms())
+    assert waits == [500, 1000, 2000, 3000, 3000]
+
+
+@pytest.mark.parametrize("min_interval, max_interval", [(0, 8.0), (-1, 8.0), (5.0, 2.0)])
+def test_scheduler_rejects_invalid_intervals(vol, min_interval, max_interval):
+    with pytest.raises(ValueError):
+        vol.PollingScheduler(min_interval, max_interval)
+
+
+@pytest.mark.parametrize("argv", [["--min-interval", "0"], ["--min-interval", "5", "--max-interval", "2"]])
+def test_parse_args_rejects_invalid_intervals(vol, monkeypatch, argv):
+    monkeypatch.setattr("sys.argv", ["automatic_vol.py"] + argv)
+    with pytest.raises(SystemExit):
+        vol.parse_args()
+
+
+def test_probe_cache_invalidated_by_new_language_pack(vol, tmp_path, monkeypatch):
+    pytest.importorskip("pytesseract")
+    tessdata = tmp_path / "share" / "tessdata"
+    tessdata.mkdir(parents=True)
+    (tessdata / "eng.traineddata").write_text("")
+    binary = tmp_path / "bin" / "tesseract"
+    binary.parent.mkdir()
+    binary.write_text(
+        "#!/bin/sh\n"
+        "if [ \"$1\" = \"--version\" ]; then echo 'tesseract 5.3.0'; exit 0; fi\n"
+        "echo 'List of available languages:'\n"
+        f"ls '{tessdata}' | sed 's/.traineddata//'\n"
+    )
+    binary.chmod(0o755)
+    monkeypatch.setattr(vol, "tesseract_paths", [str(binary)])
+    state_file = str(tmp_path / "state.json")
+
+    assert vol.probe_tesseract(state_file)["languages"] == ["eng"]
+    (tessdata / "deu.traineddata").write_text("")
+    stat = tessdata.stat()
+    os.utime(tessdata, (stat.st_atime, stat.st_mtime + 10))
+
+    assert sorted(vol.probe_tesseract(state_file)["languages"]) == ["deu", "eng"]
+
+
+def test_replay_with_templates_does_not_need_tesseract(vol, tmp_path, monkeypatch):
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    cv2.imwrite(str(frames / "a.png"), render("row_2.pdf", 12))
+    matcher = vol.TemplateMatcher(str(tmp_path / "templates"))
+    matcher.learn("row_2.pdf", render("row_2.pdf", 12))
+
+    def fail():
+        raise AssertionError("Tesseract darf nicht geprüft werden")
+
+    monkeypatch.setattr(vol, "ensure_tesseract", fail)
+    summary = vol.run_replay(str(frames), matcher=matcher, verbose=False)
+    assert summary["frames"] == 1
+
+
+def test_replay_video_frames_use_index_labels(vol, tmp_path):
+    video_path = str(tmp_path / "aufnahme.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 5, (100, 30))
+    if not writer.isOpened():
+        pytest.skip("Kein Video-Encoder verfügbar")
+    for _ in range(3):
+        writer.write(render("row_2.pdf", 12))
+    writer.release()
+
+    names = [name for name, _, _ in vol.load_replay_frames(video_path)]
+    assert names == ["frame_000000", "frame_000001", "frame_000002"]
+
+    labels_path = tmp_path / "labels.json"
+    labels_path.write_text('{"frame_000001": "row_2.pdf"}')
+    assert vol.load_labels(str(labels_path), video_path) == {"frame_000001": "row_2.pdf"}
@@ -0,0 +1,253 @@
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+fpdf = pytest.importorskip("fpdf")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def csv_to_pdf(load_script):
+    return load_script("csv-to-pdf.py")
+
+
+def without_date(data):
+    return re.sub(rb"/CreationDate \(D:\d+\)", b"", data)
+
+
+def reference_pdf(values):
+    # So wurde bisher jede Zeile erzeugt: neues FPDF-Objekt mit eigener Seite und Schrift
+    pdf = fpdf.FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    for value in values:
+        pdf.multi_cell(0, 10, txt=value.strip())
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def write_csv(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_template_output_matches_fresh_document(csv_to_pdf, tmp_path):
+    lines = ["Mercedes;", "Porsche;Audi;VW", "Ferrari;" + "lang " * 60]
+    csv_to_pdf.create_pdfs_from_csv(write_csv(tmp_path / "daten.csv", lines), str(tmp_path / "out"))
+
+    assert sorted(os.listdir(tmp_path / "out")) == ["row_1.pdf", "row_2.pdf", "row_3.pdf"]
+    for index, line in enumerate(lines, 1):
+        with open(tmp_path / "out" / f"row_{index}.pdf", "rb") as f:
+            assert without_date(f.read()) == without_date(reference_pdf(line.split(";")))
+
+
+def test_rows_are_read_lazily(csv_to_pdf, tmp_path):
+    path = write_csv(tmp_path / "daten.csv", ["a;b", "c"])
+    rows = csv_to_pdf.iter_rows(path)
+    assert next(rows) == (1, ("a", "b"))
+    assert list(rows) == [(2, ("c",))]
+
+
+def test_quoted_fields_keep_delimiters_and_newlines(csv_to_pdf, tmp_path):
+    path = tmp_path / "daten.csv"
+    path.write_text('Name;Notiz\n"Müller; Hans";"Zeile 1\nZeile 2"\n"sagt ""hallo""";x\n', encoding="utf-8")
+    assert list(csv_to_pdf.iter_rows(str(path))) == [
+        (1, ("Name", "Notiz")),
+        (2, ("Müller; Hans", "Zeile 1\nZeile 2")),
+        (3, ('sagt "hallo"', "x")),
+    ]
+
+
+@pytest.mark.parametrize("content, encoding, expected, first_row", [
+    ("Mercedes;\nPorsche;Audi;VW\nFerrari;\nTesla;\n", "utf-8", ("utf-8-sig", ";"), ("Mercedes", "")),
+    ("\ufeffa,b,c\n1,2,3\n4,5,6\n", "utf-8", ("utf-8-sig", ","), ("a", "b", "c")),
+    ("Straße\tGröße\n€ 5\t7\n", "cp1252", ("cp1252", "\t"), ("Straße", "Größe")),
+    ("nur ein Feld\n", "utf-8", ("utf-8-sig", ";"), ("nur ein Feld",)),
+])
+def test_format_is_sniffed(csv_to_pdf, tmp_path, content, encoding, expected, first_row):
+    path = tmp_path / "daten.csv"
+    path.write_bytes(content.encode(encoding))
+    csv_format = csv_to_pdf.sniff_format(str(path))
+    assert (csv_format.encoding, csv_format.delimiter) == expected
+    assert next(csv_to_pdf.iter_rows(str(path), csv_format)) == (1, first_row)
+
+
+def test_pandas_reader_reads_in_chunks(csv_to_pdf, tmp_path):
+    pytest.importorskip("pandas")
+    lines = ['a;"b;c";d', "e;f", "", "g;h;i"] * 5
+    path = write_csv(tmp_path / "daten.csv", lines)
+    csv_rows = list(csv_to_pdf.iter_rows(path))
+    pandas_rows = list(csv_to_pdf.iter_rows(path, reader="pandas", chunk_rows=3))
+    assert [index for index, _ in pandas_rows] == list(range(1, 21))
+    # pandas füllt kürzere Datensätze mit leeren Feldern auf
+    for (_, expected), (_, values) in zip(csv_rows, pandas_rows):
+        assert values == tuple(expected) + ("",) * (3 - len(expected))
+
+
+def test_decoding_errors_are_reported(csv_to_pdf, tmp_path, capsys):
+    path = tmp_path / "daten.csv"
+    path.write_bytes("Größe;1\n".encode("cp1252"))
+    csv_to_pdf.create_pdfs_from_csv(str(path), str(tmp_path / "out"), encoding="utf-8")
+    assert "Fehler beim Verarbeiten der CSV-Datei" in capsys.readouterr().out
+
+
+def test_missing_file_is_reported(csv_to_pdf, tmp_path, capsys):
+    csv_to_pdf.create_pdfs_from_csv(str(tmp_path / "fehlt.csv"), str(tmp_path / "out"))
+    assert "existiert nicht" in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / "out")
+
+
+def test_parallel_mode_keeps_row_order(tmp_path):
+    lines = [f"Zeile {i};Wert {i * i}" for i in range(1, 24)]
+    path = write_csv(tmp_path / "daten.csv", lines)
+    script = os.path.join(REPO_ROOT, "csv-to-pdf.py")
+
+    serial = subprocess.run([sys.executable, script, path, str(tmp_path / "seriell")],
+                            capture_output=True, text=True, timeout=60)
+    parallel = subprocess.run([sys.executable, script, path, str(tmp_path / "parallel"),
+                               "--workers", "3", "--chunk-size", "4"], capture_output=True, text=True, timeout=60)
+    assert parallel.returncode == 0, parallel.stderr
+
+    reported = [line.rsplit("row_", 1)[1] for line in parallel.stdout.splitlines()]
+    assert reported == [f"{i}.pdf" for i in range(1, 24)]
+    assert serial.stdout.replace("seriell", "parallel") == parallel.stdout
+    for i in range(1, 24):
+        with open(tmp_path / "seriell" / f"row_{i}.pdf", "rb") as a, \
+                open(tmp_path / "parallel" / f"row_{i}.pdf", "rb") as b:
+            assert without_date(a.read()) == without_date(b.read())
+
+
+def test_chunks_cover_all_rows(csv_to_pdf):
+    chunks = list(csv_to_pdf.iter_chunks(iter(range(10)), 4))
+    assert chunks == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def page_count(path):
+    with open(path, "rb") as f:
+        return int(re.search(rb"/Count (\d+)", f.read()).group(1))
+
+
+def test_batched_output_with_json_index(csv_to_pdf, tmp_path):
+    # Zeile 3 ist so lang, dass sie über zwei Seiten läuft
+    lines = ["eins", "zwei;drei", ";".join(["lang"] * 40), "vier", "fünf"]
+    out = tmp_path / "out"
+    index_path = str(tmp_path / "index.json")
+    csv_to_pdf.create_pdfs_from_csv(write_csv(tmp_path / "daten.csv", lines), str(out), rows_per_pdf=2,
+                                    index_path=index_path)
+
+    assert sorted(os.listdir(out)) == ["rows_1-2.pdf", "rows_3-4.pdf", "rows_5-5.pdf"]
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    assert index["1"] == {"file": "rows_1-2.pdf", "page": 1, "pages": 1}
+    assert index["2"] == {"file": "rows_1-2.pdf", "page": 2, "pages": 1}
+    assert index["3"]["file"] == "rows_3-4.pdf" and index["3"]["page"] == 1 and index["3"]["pages"] == 2
+    assert index["4"] == {"file": "rows_3-4.pdf", "page": 3, "pages": 1}
+    assert index["5"] == {"file": "rows_5-5.pdf", "page": 1, "pages": 1}
+    assert page_count(out / "rows_3-4.pdf") == 3
+
+
+def test_single_pdf_with_sqlite_index(csv_to_pdf, tmp_path):
+    lines = [f"Zeile {i}" for i in range(1, 1501)]
+    # Einige Zeilen laufen über zwei Seiten, damit sich die Seitenversätze verschieben
+    for i in (10, 700, 1499):
+        lines[i - 1] = ";".join(["lang"] * 40)
+    out = tmp_path / "out"
+    index_path = str(tmp_path / "index.sqlite")
+    csv_to_pdf.create_pdfs_from_csv(write_csv(tmp_path / "daten.csv", lines), str(out), workers=4,
+                                    rows_per_pdf=0, index_path=index_path)
+
+    assert os.listdir(out) == ["rows_1-1500.pdf"]
+    with sqlite3.connect(index_path) as db:
+        rows = db.execute("SELECT row, file, page, pages FROM rows ORDER BY row").fetchall()
+
+    assert [row for row, _, _, _ in rows] == list(range(1, 1501))
+    assert {file for _, file, _, _ in rows} == {"rows_1-1500.pdf"}
+    assert [row for row, _, _, pages in rows if pages == 2] == [10, 700, 1499]
+    # Jede Zeile beginnt direkt nach der vorigen, die letzte endet auf der letzten Seite der Datei
+    assert rows[0][2] == 1
+    for (_, _, page, pages), (_, _, next_page, _) in zip(rows, rows[1:]):
+        assert next_page == page + pages
+    assert rows[-1][2] + rows[-1][3] - 1 == page_count(out / "rows_1-1500.pdf") == 1503
+
+
+def pdf_files(folder):
+    return sorted(name for name in os.listdir(folder) if name.endswith(".pdf"))
+
+
+def test_incremental_run_only_regenerates_changes(csv_to_pdf, tmp_path, capsys):
+    out = tmp_path / "out"
+    path = write_csv(tmp_path / "daten.csv", ["a", "b", "c", "d"])
+    csv_to_pdf.create_pdfs_from_csv(path, str(out), incremental=True)
+    assert pdf_files(out) == ["row_1.pdf", "row_2.pdf", "row_3.pdf", "row_4.pdf"]
+    before = {name: os.stat(out / name).st_mtime_ns for name in pdf_files(out)}
+    capsys.readouterr()
+
+    # Zeile 2 geändert, Zeile 4 entfernt, gelöschte Ausgabedatei 3 wird neu erzeugt
+    os.remove(out / "row_3.pdf")
+    write_csv(tmp_path / "daten.csv", ["a", "B", "c"])
+    csv_to_pdf.create_pdfs_from_csv(path, str(out), incremental=True)
+    output = capsys.readouterr().out
+
+    assert pdf_files(out) == ["row_1.pdf", "row_2.pdf", "row_3.pdf"]
+    assert "row_1.pdf" not in output
+    assert "row_2.pdf" in output and "row_3.pdf" in output
+    assert "1 unverändert übersprungen, 1 verwaiste Datei(en) gelöscht" in output
+    assert os.stat(out / "row_1.pdf").st_mtime_ns == before["row_1.pdf"]
+    with open(out / "row_2.pdf", "rb") as f:
+        assert without_date(f.read()) == without_date(reference_pdf(["B"]))
+
+
+def test_incremental_batches_keep_index_complete(csv_to_pdf, tmp_path, capsys):
+    out = tmp_path / "out"
+    lines = [f"Zeile {i}" for i in range(1, 7)]
+    path = write_csv(tmp_path / "daten.csv", lines)
+    csv_to_pdf.create_pdfs_from_csv(path, str(out), rows_per_pdf=2, incremental=True)
+    capsys.readouterr()
+
+    lines[4] = "geändert"
+    write_csv(tmp_path / "daten.csv", lines)
+    index_path = str(tmp_path / "index.json")
+    csv_to_pdf.create_pdfs_from_csv(path, str(out), rows_per_pdf=2, index_path=index_path, incremental=True)
+    output = capsys.readouterr().out
+
+    assert [line for line in output.splitlines() if line.startswith("PDF erstellt")] == \
+        [f"PDF erstellt: {os.path.join(str(out), 'rows_5-6.pdf')}"]
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    assert sorted(index, key=int) == ["1", "2", "3", "4", "5", "6"]
+    assert index["3"] == {"file": "rows_3-4.pdf", "page": 1, "pages": 1}
+
+    # Wechsel auf eine Gesamtdatei: alle Stapeldateien werden verwaist
+    csv_to_pdf.create_pdfs_from_csv(path, str(out), rows_per_pdf=0, incremental=True)
+    assert pdf_files(out) == ["rows_1-6.pdf"]
+
+
+def test_characters_outside_latin1_do_not_abort(csv_to_pdf, tmp_path):
+    path = tmp_path / "daten.csv"
+    path.write_text("Łódź;東京 🚗;Größe\n", encoding="utf-8")
+    csv_to_pdf.create_pdfs_from_csv(str(path), str(tmp_path / "out"))
+    with open(tmp_path / "out" / "row_1.pdf", "rb") as f:
+        assert without_date(f.read()) == without_date(reference_pdf(["?ód?", "?? ?", "Größe"]))
+
+
+def test_synthetic_csv_round_trip(csv_to_pdf, tmp_path):
+    path = str(tmp_path / "bench.csv")
+    assert csv_to_pdf.generate_csv(path, rows=20, fields=4, field_length=30, unicode=True) == os.path.getsize(path)
+    rows = list(csv_to_pdf.iter_rows(path))
+    assert len(rows) == 20
+    assert all(len(values) == 4 for _, values in rows)
+    assert rows[7][1][2].endswith("; 7")
+
+
+def test_benchmark_reports_all_modes(csv_to_pdf, capsys):
+    csv_to_pdf.run_benchmark(row_counts=(20,), field_counts=(3,), field_lengths=(10,), workers=1)
+    output = capsys.readouterr().out
+    for label in ("eine Datei pro Zeile", "parallel (Prozesse: 1)", "1000 Zeilen pro Datei", "eine Gesamtdatei"):
+        assert output.count(label) >= 2
+    assert output.count("Zeilen/s") == 8
+    assert "multi_cell" in output and "pdf.output" in output and "Einlesen" in output
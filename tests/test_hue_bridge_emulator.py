@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+
+@pytest.fixture(scope="module")
+def emulator_module(load_script):
+    return load_script("hue-bridge-emulator.py")
+
+
+@pytest.fixture(scope="module")
+def hue(load_script):
+    return load_script("advanced-hue-connect.py")
+
+
+@pytest.fixture
+def emulator(emulator_module):
+    bridge = emulator_module.HueBridgeEmulator(light_count=3)
+    bridge.start_in_thread()
+    yield bridge
+    bridge.stop()
+
+
+def test_pairing_requires_link_button(emulator):
+    url = f"http://{emulator.address}/api"
+    result = requests.post(url, json={"devicetype": "test"}, timeout=5).json()
+    assert result[0]["error"]["type"] == 101
+
+    emulator.press_link_button()
+    result = requests.post(url, json={"devicetype": "test"}, timeout=5).json()
+    assert result[0]["success"]["username"] in emulator.users
+
+
+def test_lights_require_known_user(emulator):
+    result = requests.get(f"http://{emulator.address}/api/unbekannt/lights", timeout=5).json()
+    assert result[0]["error"]["type"] == 1
+
+
+def test_config_is_public(emulator):
+    config = requests.get(f"http://{emulator.address}/api/config", timeout=5).json()
+    assert config["bridgeid"] == "001788FFFE00E1A0"
+    assert config["mac"] == "00:17:88:00:e1:a0"
+
+
+def test_latency_is_applied(emulator_module):
+    bridge = emulator_module.HueBridgeEmulator(latency=0.2)
+    bridge.start_in_thread()
+    try:
+        start = time.perf_counter()
+        requests.get(f"http://{bridge.address}/api/config", timeout=5)
+        assert time.perf_counter() - start >= 0.2
+    finally:
+        bridge.stop()
+
+
+def test_command_limit_returns_internal_error(emulator_module):
+    bridge = emulator_module.HueBridgeEmulator(link_button=True, light_count=1, command_limit=2)
+    bridge.start_in_thread()
+    try:
+        username = requests.post(f"http://{bridge.address}/api", json={"devicetype": "t"},
+                                 timeout=5).json()[0]["success"]["username"]
+        url = f"http://{bridge.address}/api/{username}/lights/1/state"
+        results = [requests.put(url, json={"bri": i}, timeout=5).json()[0] for i in range(3)]
+        assert ["success" in result for result in results] == [True, True, False]
+        assert results[2]["error"]["type"] == 901
+    finally:
+        bridge.stop()
+
+
+def test_tool_pairs_and_controls_lights(emulator, hue):
+    emulator.press_link_button()
+    username = hue.pair_bridge(emulator.address)
+
+    # Alle Methoden fragen gleichzeitig an, angelegt wird trotzdem nur ein Benutzer
+    assert emulator.users == {username}
+    assert hue.test_connection(emulator.address, username)
+    assert hue.apply_scene(emulator.address, username, {"lights": {"1": {"on": True}, "2": {"on": True},
+                                                                  "3": {"on": True, "bri": 1}}}, rate=50)
+    assert [light["state"]["on"] for light in emulator.lights.values()] == [True, True, True]
+    assert emulator.lights["3"]["state"]["bri"] == 1
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def _paired_user(bridge):
+    bridge.users.add("cache-test")
+    return "cache-test"
+
+
+def test_state_cache_follows_event_stream(emulator, hue):
+    username = _paired_user(emulator)
+    cache = hue.LightStateCache(emulator.address, username, poll_interval=60, eventstream_scheme="http")
+    changes = []
+    cache.subscribe(lambda light_id, changed: changes.append((light_id, changed)))
+    cache.start()
+    try:
+        assert _wait_for(lambda: cache.mode == "eventstream")
+        requests.put(f"http://{emulator.address}/api/{username}/lights/2/state",
+                     json={"on": True, "bri": 127}, timeout=5)
+        assert _wait_for(lambda: cache.get(2)["bri"] == 127)
+        assert cache.get("2")["on"] is True
+        assert cache.polls == 1
+        assert cache.events_received >= 1
+    finally:
+        cache.stop()
+    # Nur die initiale Befüllung und die tatsächlich geänderten Felder werden gemeldet
+    assert changes[-1] == ("2", {"on": True, "bri": 127})
+
+
+def test_state_cache_falls_back_to_polling(emulator_module, hue):
+    bridge = emulator_module.HueBridgeEmulator(light_count=2, eventstream=False)
+    bridge.start_in_thread()
+    username = _paired_user(bridge)
+    cache = hue.LightStateCache(bridge.address, username, poll_interval=0.05, eventstream_scheme="http")
+    changes = []
+    cache.start()
+    cache.subscribe(lambda light_id, changed: changes.append((light_id, changed)))
+    try:
+        assert _wait_for(lambda: cache.mode == "polling")
+        requests.put(f"http://{bridge.address}/api/{username}/lights/1/state", json={"bri": 10}, timeout=5)
+        assert _wait_for(lambda: cache.get(1)["bri"] == 10)
+        assert _wait_for(lambda: cache.polls >= 4)
+    finally:
+        cache.stop()
+        bridge.stop()
+    assert changes == [("1", {"bri": 10})]
@@ -0,0 +1,199 @@
+import collections
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("tkinter")
+pytest.importorskip("pyautogui")
+pytest.importorskip("screeninfo")
+
+
+@pytest.fixture(scope="module")
+def gui(load_script):
+    return load_script("the-click-so-chic-secondary-gui.py")
+
+
+Monitor = collections.namedtuple("Monitor", "x y width height")
+
+MONITORS = {
+    "Monitor 1": Monitor(0, 0, 1920, 1080),
+    "Monitor 2": Monitor(1920, -200, 2560, 1440),
+}
+
+
+class FakeClock:
+    """Simulierte Uhr: Warten und Arbeit rücken die Zeit vor, ohne wirklich zu schlafen."""
+
+    def __init__(self, oversleep=0.0):
+        self.now = 100.0
+        self.oversleep = oversleep
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEvent(threading.Event):
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        self.clock.now += timeout + self.clock.oversleep
+        return self.is_set()
+
+
+def test_scheduler_has_no_cumulative_drift(gui):
+    clock = FakeClock(oversleep=0.002)
+    scheduler = gui.ClickScheduler(0.1, FakeEvent(clock), clock=clock)
+    scheduler.start()
+    for _ in range(1000):
+        clock.now += 0.03  # Dauer des Klicks
+        assert scheduler.wait()
+
+    # 1000 Takte à 100 ms: nur die Verspätung des letzten Takts bleibt übrig
+    assert clock.now - 100.0 == pytest.approx(100.0 + 0.002)
+    stats = scheduler.stats()
+    assert stats["count"] == 500
+    assert stats["mean_ms"] == pytest.approx(2.0)
+    assert stats["skipped"] == 0
+
+
+def test_scheduler_skips_missed_ticks(gui):
+    clock = FakeClock()
+    scheduler = gui.ClickScheduler(0.1, FakeEvent(clock), clock=clock)
+    scheduler.start()
+    clock.now += 0.35  # Klick hängt über drei Takte
+    assert scheduler.wait()
+    assert scheduler.skipped == 2
+    assert scheduler.next_deadline == pytest.approx(100.3)
+    assert scheduler.stats()["max_ms"] == pytest.approx(50.0)
+
+
+def test_scheduler_clamps_interval(gui):
+    assert gui.ClickScheduler(0, threading.Event()).interval == gui.MIN_INTERVAL
+    assert gui.ClickScheduler(0.5, threading.Event()).stats() is None
+
+
+def test_no_clicks_after_stop(gui):
+    # Langes Intervall: ohne sofortigen Abbruch des Wartens würde der Thread am Ende nicht beendet
+    stop_event = threading.Event()
+    scheduler = gui.ClickScheduler(60.0, stop_event)
+    settings_queue = gui.queue.Queue()
+    settings_queue.put(gui.ClickSettings(((1, 1, 60.0),), "Test"))
+    clicks = []
+    first_click = threading.Event()
+
+    def click(x, y):
+        clicks.append((x, y))
+        first_click.set()
+
+    thread = threading.Thread(target=gui.run_clicks, args=(settings_queue, scheduler, click, pytest.fail))
+    thread.start()
+    assert first_click.wait(10)
+    stop_event.set()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert clicks == [(1, 1)]
+    assert scheduler.stats() is None
+
+
+def test_scheduler_uses_per_target_delays(gui):
+    clock = FakeClock()
+    scheduler = gui.ClickScheduler(1.0, FakeEvent(clock), clock=clock)
+    scheduler.start()
+    for delay in (0.2, 0.5, 0.3) * 100:
+        clock.now += 0.05
+        assert scheduler.wait(delay)
+    assert clock.now == pytest.approx(200.0)
+    assert scheduler.stats()["max_ms"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_click_plan_has_absolute_coordinates_and_repeats(gui):
+    targets = [
+        gui.Target("Monitor 1", 50.0, 25.0, 0.5, 2),
+        gui.Target("Monitor 2", 10.0, 50.0, 1.5, 1),
+        gui.Target("Monitor 1", 100.0, 0.0, 0.2, 3),
+    ]
+    assert gui.build_click_plan(targets, MONITORS) == [
+        (960, 270, 0.5), (960, 270, 0.5),
+        (2176, 520, 1.5),
+        (1920, 0, 0.2), (1920, 0, 0.2), (1920, 0, 0.2),
+    ]
+
+
+@pytest.mark.parametrize("targets", [[], [("Monitor 3", 50.0, 50.0, 1.0, 1)]])
+def test_click_plan_rejects_empty_or_unknown_monitor(gui, targets):
+    with pytest.raises(ValueError):
+        gui.build_click_plan([gui.Target(*target) for target in targets], MONITORS)
+
+
+@pytest.mark.parametrize("data", [
+    {"monitor": "Monitor 1", "x_percent": 120, "y_percent": 50, "delay": 1},
+    {"monitor": "Monitor 1", "x_percent": 50, "y_percent": 50, "delay": 0},
+    {"monitor": "Monitor 1", "x_percent": 50, "y_percent": 50, "delay": 1, "repeat": 0},
+])
+def test_target_from_dict_rejects_invalid_values(gui, data):
+    with pytest.raises(ValueError):
+        gui.target_from_dict(data)
+
+
+def test_profiles_round_trip_and_keep_old_position(gui, tmp_path):
+    path = str(tmp_path / "autoclicker_config.json")
+    (tmp_path / "autoclicker_config.json").write_text(
+        '{"monitor": "Monitor 2", "x_position": 51.15, "y_position": 1.02, "interval": 10.0}')
+    sequence = [gui.Target("Monitor 1", 50.0, 25.0, 0.5, 2), gui.Target("Monitor 2", 10.0, 50.0, 1.5, 1)]
+
+    config = gui.read_config(path)
+    config.setdefault("profiles", {})["Farm"] = [target._asdict() for target in sequence]
+    gui.write_config(path, config)
+
+    reloaded = gui.read_config(path)
+    assert reloaded["x_position"] == 51.15
+    assert [gui.target_from_dict(data) for data in reloaded["profiles"]["Farm"]] == sequence
+
+
+def test_read_config_tolerates_missing_or_broken_file(gui, tmp_path):
+    assert gui.read_config(str(tmp_path / "fehlt.json")) == {}
+    broken = tmp_path / "kaputt.json"
+    broken.write_text("{nicht json")
+    assert gui.read_config(str(broken)) == {}
+    broken.write_text(json.dumps([1, 2]))
+    assert gui.read_config(str(broken)) == {}
+
+
+def test_worker_follows_settings_queue(gui):
+    clock = FakeClock()
+    stop_event = FakeEvent(clock)
+    scheduler = gui.ClickScheduler(1.0, stop_event, clock=clock)
+    settings_queue = gui.queue.Queue()
+    settings_queue.put(gui.ClickSettings(((1, 1, 0.5), (2, 2, 0.5)), "alt"))
+    clicks = []
+
+    def click(x, y):
+        clicks.append((x, y))
+        if len(clicks) == 3:
+            # Zwei Änderungen vor dem nächsten Klick: nur die neueste zählt
+            settings_queue.put(gui.ClickSettings(((3, 3, 0.5),), "zwischen"))
+            settings_queue.put(gui.ClickSettings(((4, 4, 0.5), (5, 5, 0.5)), "neu"))
+        if len(clicks) == 6:
+            stop_event.set()
+
+    gui.run_clicks(settings_queue, scheduler, click, report_error=pytest.fail)
+    assert clicks == [(1, 1), (2, 2), (1, 1), (4, 4), (5, 5), (4, 4)]
+    assert scheduler.stats()["count"] == 5
+
+
+def test_worker_reports_click_errors(gui):
+    clock = FakeClock()
+    scheduler = gui.ClickScheduler(1.0, FakeEvent(clock), clock=clock)
+    settings_queue = gui.queue.Queue()
+    settings_queue.put(gui.ClickSettings(((1, 1, 0.5),), "Test"))
+    errors = []
+
+    def click(x, y):
+        raise RuntimeError("Maus nicht verfügbar")
+
+    gui.run_clicks(settings_queue, scheduler, click, errors.append)
+    assert [str(error) for error in errors] == ["Maus nicht verfügbar"]
@@ -0,0 +1,289 @@
+import os
+import random
+import subprocess
+import sys
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def game(load_script):
+    return load_script("vier-gewinnt.py")
+
+
+def brute_force_win(board, piece):
+    # Unabhängige Referenz: alle Viererfenster direkt prüfen
+    rows, cols = board.shape
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                cells = [(r + i * dr, c + i * dc) for i in range(4)]
+                if all(0 <= y < rows and 0 <= x < cols and board[y][x] == piece for y, x in cells):
+                    return True
+    return False
+
+
+def random_positions(game, count, seed=1):
+    rng = random.Random(seed)
+    for _ in range(count):
+        bitboard = game.BitBoard()
+        board = game.create_board()
+        piece = 1
+        for _ in range(rng.randrange(1, 43)):
+            columns = [c for c in range(game.COLUMN_COUNT) if bitboard.can_play(c)]
+            if not columns:
+                break
+            col = rng.choice(columns)
+            row = game.get_next_open_row(board, col)
+            assert bitboard.play(col, piece) == row
+            board[row][col] = piece
+            yield bitboard, board
+            piece = 3 - piece
+
+
+def test_bitboard_matches_array_rules(game):
+    for bitboard, board in random_positions(game, 150):
+        assert np.array_equal(bitboard.to_array(), board)
+        assert np.array_equal(game.BitBoard.from_array(board).to_array(), board)
+        for piece in (1, 2):
+            expected = brute_force_win(board, piece)
+            assert bitboard.is_win(piece) == expected
+            assert game.winning_move(board, piece) == expected
+            assert game.winning_move(bitboard, piece) == expected
+        for col in range(game.COLUMN_COUNT):
+            assert game.is_valid_location(bitboard, col) == game.is_valid_location(board, col)
+            assert game.get_next_open_row(bitboard, col) == game.get_next_open_row(board, col)
+
+
+def test_undo_restores_position(game):
+    bitboard = game.BitBoard()
+    for col in (3, 3, 2, 4, 2):
+        bitboard.play(col, 1 + bitboard.moves % 2)
+    before = (list(bitboard.bits), list(bitboard.heights), bitboard.moves)
+    bitboard.play(5, 2)
+    bitboard.undo(5)
+    assert (bitboard.bits, bitboard.heights, bitboard.moves) == before
+
+
+@pytest.mark.parametrize("cells", [
+    [(0, 0), (0, 1), (0, 2), (0, 3)],
+    [(2, 6), (3, 6), (4, 6), (5, 6)],
+    [(0, 3), (1, 4), (2, 5), (3, 6)],
+    [(5, 0), (4, 1), (3, 2), (2, 3)],
+])
+def test_edge_lines_are_detected(game, cells):
+    board = game.create_board()
+    for r, c in cells:
+        board[r][c] = 2
+    assert game.winning_move(board, 2)
+    assert not game.winning_move(board, 1)
+
+
+def test_no_wrap_around_between_columns(game):
+    # Oberste Zeile einer Spalte und unterste der nächsten sind keine Nachbarn
+    board = game.create_board()
+    board[4][0] = board[5][0] = board[0][1] = board[1][1] = 1
+    assert not game.winning_move(board, 1)
+
+
+def play_columns(game, columns):
+    bitboard = game.BitBoard()
+    for col in columns:
+        bitboard.play(col, 1 + bitboard.moves % 2)
+    return bitboard
+
+
+def test_zobrist_hash_is_incremental(game):
+    bitboard = play_columns(game, [3, 3, 4, 2, 5])
+    assert bitboard.hash == game.BitBoard.from_array(bitboard.to_array()).hash
+    bitboard.undo(5)
+    assert bitboard.hash == play_columns(game, [3, 3, 4, 2]).hash
+
+
+def test_ai_takes_immediate_win(game):
+    # Spieler 1 hat drei Steine in Spalten 0-2 der untersten Reihe
+    bitboard = play_columns(game, [0, 0, 1, 1, 2, 6])
+    assert game.AIPlayer(1, time_limit=0.2).choose_move(bitboard) == 3
+
+
+def test_ai_blocks_opponent_threat(game):
+    # Spieler 1 droht senkrecht in Spalte 1, Spieler 2 muss blockieren
+    bitboard = play_columns(game, [1, 5, 1, 6, 1])
+    ai = game.AIPlayer(2, time_limit=0.3)
+    assert ai.choose_move(bitboard) == 1
+
+
+def test_ai_respects_time_budget(game):
+    ai = game.AIPlayer(1, time_limit=0.2)
+    start = time.perf_counter()
+    ai.choose_move(game.BitBoard())
+    assert time.perf_counter() - start < 1.0
+    assert ai.last_depth >= 1
+
+
+def test_ai_opens_in_center(game):
+    # Feste Tiefe statt Zeitbudget, damit das Ergebnis nicht von der Rechnerlast abhängt
+    ai = game.AIPlayer(1, time_limit=float("inf"), max_depth=6)
+    assert ai.choose_move(game.BitBoard()) == 3
+    assert ai.last_depth == 6
+
+
+def test_transposition_table_replacement(game):
+    table = game.TranspositionTable(size=4)
+    table.store(1, 5, 10, game.EXACT, 3)
+    table.store(5, 2, 20, game.EXACT, 2)  # gleicher Platz, geringere Tiefe: bleibt verworfen
+    assert table.get(1)[2] == 10 and table.get(5) is None
+    table.new_search()
+    table.store(5, 2, 20, game.EXACT, 2)  # alter Eintrag aus früherer Suche wird ersetzt
+    assert table.get(5)[2] == 20 and table.get(1) is None
+
+
+def test_ai_beats_random_player(game):
+    rng = random.Random(7)
+    ai = game.AIPlayer(2, time_limit=0.05)
+    for _ in range(3):
+        bitboard = game.BitBoard()
+        while True:
+            col = rng.choice([c for c in range(game.COLUMN_COUNT) if bitboard.can_play(c)])
+            bitboard.play(col, 1)
+            assert not bitboard.is_win(1)
+            bitboard.play(ai.choose_move(bitboard), 2)
+            if bitboard.is_win(2):
+                break
+
+
+@pytest.mark.parametrize("depth, expected", [(1, 7), (2, 49), (3, 343), (4, 2401), (5, 16807), (6, 117649)])
+def test_perft_counts(game, depth, expected):
+    assert game.perft(game.BitBoard(), depth) == expected
+
+
+def test_self_play_summary(game):
+    summary = game.run_self_play(2, workers=1, time_limit=0.01)
+    assert sum(summary["results"].values()) == 2
+    assert summary["nodes_per_second"] > 0
+    assert 7 <= summary["average_moves"] <= 42
+
+
+def test_benchmark_cli_uses_process_pool():
+    result = subprocess.run([sys.executable, os.path.join(REPO_ROOT, "vier-gewinnt.py"), "--benchmark",
+                             "--perft-depth", "3", "--games", "2", "--workers", "2", "--time-limit", "0.01"],
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "Perft(3): 343 Stellungen" in result.stdout
+    assert "Selbstspiel: 2 Partien" in result.stdout
+
+
+def test_batch_win_detection_matches_single_board(game):
+    boards = np.array([board.copy() for _, board in random_positions(game, 60, seed=3)])
+    wins = game.winning_moves_batch(boards, chunk_size=97)
+    assert wins.shape == (len(boards), 2)
+    for board, (first, second) in zip(boards, wins):
+        assert first == brute_force_win(board, 1)
+        assert second == brute_force_win(board, 2)
+    assert wins[:, 0].any() and wins[:, 1].any()
+
+
+def test_batch_win_detection_rejects_wrong_shape(game):
+    with pytest.raises(ValueError):
+        game.winning_moves_batch(np.zeros((6, 7), dtype=int))
+
+
+def test_opening_book_round_trip(game, tmp_path):
+    path = str(tmp_path / "book.bin")
+    count = game.build_opening_book(path, ply=2, depth=2)
+    # 1 + 4 + 25 Stellungen bis Halbzug 2, Spiegelbilder zusammengefasst
+    assert count == 30
+    assert os.path.getsize(path) == game.BOOK_HEADER.size + count * game.BOOK_RECORD.size
+
+    with game.OpeningBook(path) as book:
+        assert len(book) == count
+        left = play_columns(game, [0, 1])
+        right = play_columns(game, [6, 5])
+        move, _ = book.lookup(left, 1)
+        mirrored_move, _ = book.lookup(right, 1)
+        assert mirrored_move == game.COLUMN_COUNT - 1 - move
+        assert book.lookup(play_columns(game, [0, 1, 2]), 2) is None
+
+        ai = game.AIPlayer(1, book=book)
+        assert ai.choose_move(game.BitBoard()) == book.lookup(game.BitBoard(), 1)[0]
+        assert ai.last_source == "Buch"
+
+
+def test_opening_book_rejects_other_files(game, tmp_path):
+    path = tmp_path / "kein-buch.bin"
+    path.write_bytes(b"0123456789abcdef")
+    with pytest.raises(ValueError):
+        game.OpeningBook(str(path))
+
+
+def minimax(game, board, piece):
+    # Vollständige Suche ohne Schnitte und Zwischenspeicher als Referenz
+    moves = [c for c in range(game.COLUMN_COUNT) if board.can_play(c)]
+    if not moves:
+        return 0
+    best = None
+    for col in moves:
+        board.play(col, piece)
+        score = game.WIN_SCORE - board.moves if board.is_win(piece) else -minimax(game, board, 3 - piece)
+        board.undo(col)
+        best = score if best is None else max(best, score)
+    return best
+
+
+def self_play_position(game, seed, empty_cells):
+    rng = random.Random(seed)
+    players = {1: game.AIPlayer(1, time_limit=0.01, endgame_cells=0),
+               2: game.AIPlayer(2, time_limit=0.01, endgame_cells=0)}
+    bitboard, piece = game.BitBoard(), 1
+    while game.ROW_COUNT * game.COLUMN_COUNT - bitboard.moves > empty_cells:
+        if bitboard.moves < 4:
+            col = rng.choice([c for c in range(game.COLUMN_COUNT) if bitboard.can_play(c)])
+        else:
+            col = players[piece].choose_move(bitboard)
+        bitboard.play(col, piece)
+        if bitboard.is_win(piece):
+            return None, None
+        piece = 3 - piece
+    return bitboard, piece
+
+
+def test_endgame_solver_matches_minimax(game):
+    solver = game.EndgameSolver()
+    checked = 0
+    for seed in range(8):
+        bitboard, piece = self_play_position(game, seed, empty_cells=8)
+        if bitboard is None:
+            continue
+        expected = minimax(game, bitboard, piece)
+        move, score = solver.best_move(bitboard, piece)
+        assert score == expected
+        bitboard.play(move, piece)
+        # Der gewählte Zug erreicht die exakte Bewertung
+        assert (game.WIN_SCORE - bitboard.moves if bitboard.is_win(piece)
+                else -minimax(game, bitboard, 3 - piece)) == expected
+        bitboard.undo(move)
+        checked += 1
+
+        nodes = solver.nodes
+        assert solver.best_move(bitboard, piece) == (move, score)
+        assert solver.nodes <= nodes  # zweiter Aufruf profitiert vom Zwischenspeicher
+    assert checked >= 3
+
+
+def test_ai_uses_endgame_solver(game):
+    for seed in range(8):
+        bitboard, piece = self_play_position(game, seed, 12)
+        if bitboard is None or any(bitboard.can_play(c) and bitboard.is_winning_move(c, piece)
+                                   for c in range(game.COLUMN_COUNT)):
+            continue
+        ai = game.AIPlayer(piece, endgame_cells=12)
+        move = ai.choose_move(bitboard)
+        assert (ai.last_source, ai.last_depth) == ("Endspiel", 12)
+        assert (move, ai.last_score) == ai.solver.best_move(bitboard, piece)
+        return
+    pytest.fail("keine offene Endstellung gefunden")
@@ -1,5 +1,9 @@
+import collections
+import itertools
 import json
 import os
+import queue
+import statistics
 import threading
 import time
 import tkinter as tk
@@ -9,16 +13,183 @@ import pyautogui
 from screeninfo import get_monitors
 
 
+# Kleinstes Klickintervall, damit ein Eingabefehler (0 oder negativ) keine Dauerschleife erzeugt
+MIN_INTERVAL = 0.01
+
+
+class ClickScheduler:
+    """Taktgeber für den Klick-Thread mit festen Sollzeitpunkten auf der monotonen Uhr.
+
+    Jeder Sollzeitpunkt ergibt sich aus dem vorigen plus der Wartezeit (interval oder die
+    Verzögerung des Ziels), unabhängig davon, wie lange Klick und Ausgabe dauern;
+    Abweichungen summieren sich daher nicht auf. Gewartet wird mit
+    stop_event.wait, sodass ein Stopp sofort wirkt. Die Verspätung gegenüber dem Sollzeitpunkt
+    wird für die Anzeige im Fenster gesammelt.
+    """
+
+    def __init__(self, interval, stop_event, history=500, clock=time.monotonic):
+        self.interval = max(interval, MIN_INTERVAL)
+        self.stop_event = stop_event
+        self.clock = clock
+        self.next_deadline = None
+        self.lateness = collections.deque(maxlen=history)
+        self.skipped = 0
+
+    def start(self):
+        self.next_deadline = self.clock()
+
+    def wait(self, delay=None):
+        """Wartet bis zum nächsten Sollzeitpunkt; liefert False, wenn vorher gestoppt wurde."""
+        step = self.interval if delay is None else max(delay, MIN_INTERVAL)
+        self.next_deadline += step
+        remaining = self.next_deadline - self.clock()
+        if remaining > 0 and self.stop_event.wait(remaining):
+            return False
+        if self.stop_event.is_set():
+            return False
+
+        late = self.clock() - self.next_deadline
+        if late >= step:
+            # Ganze Takte verpasst (z. B. langsamer Klick): im Raster bleiben statt nachzuholen
+            missed = int(late // step)
+            self.next_deadline += missed * step
+            self.skipped += missed
+            late -= missed * step
+        self.lateness.append(late)
+        return True
+
+    def stats(self):
+        """Verspätung der letzten Takte in Millisekunden."""
+        samples = list(self.lateness)
+        if not samples:
+            return None
+        return {
+            "count": len(samples),
+            "mean_ms": statistics.fmean(samples) * 1000,
+            "max_ms": max(samples) * 1000,
+            "stdev_ms": statistics.pstdev(samples) * 1000,
+            "skipped": self.skipped,
+        }
+
+
+# Ein Ziel der Klicksequenz: Position in Prozent des Monitors, Wartezeit nach jedem Klick und Anzahl der Klicks
+Target = collections.namedtuple("Target", "monitor x_percent y_percent delay repeat")
+
+
+def target_from_dict(data):
+    """Liest ein Ziel aus einem gespeicherten Profil und prüft die Werte."""
+    target = Target(str(data["monitor"]), float(data["x_percent"]), float(data["y_percent"]),
+                    float(data["delay"]), int(data.get("repeat", 1)))
+    if not (0 <= target.x_percent <= 100 and 0 <= target.y_percent <= 100):
+        raise ValueError("Die Position muss zwischen 0 und 100 % liegen.")
+    if target.delay < MIN_INTERVAL:
+        raise ValueError(f"Die Verzögerung muss mindestens {MIN_INTERVAL} Sekunden betragen.")
+    if target.repeat < 1:
+        raise ValueError("Es muss mindestens eine Wiederholung geben.")
+    return target
+
+
+def absolute_position(monitor, x_percent, y_percent):
+    """Rechnet eine Position in Prozent des Monitors in absolute Bildschirmkoordinaten um."""
+    return int(monitor.x + monitor.width * (x_percent / 100)), int(monitor.y + monitor.height * (y_percent / 100))
+
+
+def build_click_plan(targets, monitor_info):
+    """Löst die Ziele vor dem Start in eine Liste (x, y, delay) mit absoluten Koordinaten auf.
+
+    Wiederholungen werden ausgerollt, der Klick-Thread arbeitet nur noch die fertige Liste ab.
+    """
+    plan = []
+    for target in targets:
+        monitor = monitor_info.get(target.monitor)
+        if monitor is None:
+            raise ValueError(f"{target.monitor or 'Kein Monitor'} ist nicht verfügbar.")
+        click_x, click_y = absolute_position(monitor, target.x_percent, target.y_percent)
+        plan.extend([(click_x, click_y, target.delay)] * target.repeat)
+    if not plan:
+        raise ValueError("Die Sequenz enthält keine Ziele.")
+    return plan
+
+
+# Unveränderlicher Stand der Einstellungen für den Klick-Thread: plan ist ein Tupel aus (x, y, delay)
+ClickSettings = collections.namedtuple("ClickSettings", "plan description")
+
+
+def latest_settings(settings_queue, current):
+    """Holt ohne zu warten den neuesten Einstellungsstand aus der Queue; ältere Stände werden verworfen."""
+    while True:
+        try:
+            current = settings_queue.get_nowait()
+        except queue.Empty:
+            return current
+
+
+def run_clicks(settings_queue, scheduler, click, report_error):
+    """Schleife des Klick-Threads.
+
+    Arbeitet ausschließlich mit den ClickSettings aus der Queue, die der Tk-Hauptthread befüllt,
+    und greift selbst nie auf Tk zu. Kommt während des Laufs ein neuer Stand an, beginnt dessen
+    Klickliste von vorn, der Takt des Schedulers läuft weiter. Ein Fehler beim Klicken beendet
+    die Schleife und wird über report_error gemeldet.
+    """
+    settings = settings_queue.get()
+    print(f"Autoclicker: {settings.description}")
+    clicks = itertools.cycle(settings.plan)
+    scheduler.start()
+    while True:
+        newest = latest_settings(settings_queue, settings)
+        if newest is not settings:
+            settings = newest
+            print(f"Einstellungen übernommen: {settings.description}")
+            clicks = itertools.cycle(settings.plan)
+
+        click_x, click_y, delay = next(clicks)
+        try:
+            click(click_x, click_y)
+        except Exception as e:
+            print(f"Fehler beim Klicken: {e}")
+            report_error(e)
+            return
+
+        # Bis zum nächsten Sollzeitpunkt warten; ein Stopp beendet das Warten sofort
+        if not scheduler.wait(delay):
+            return
+
+
+def read_config(path):
+    """Liest die Konfigurationsdatei; fehlt sie oder ist sie defekt, gibt es eine leere Konfiguration."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as file:
+            config = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Fehler beim Lesen der Konfiguration: {e}")
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def write_config(path, config):
+    with open(path, "w") as file:
+        json.dump(config, file, indent=2)
+
+
 class AutoClickerApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Auto Clicker")
-        self.root.geometry("600x550")  # Etwas größer für die zusätzlichen Elemente
+        self.root.geometry("1040x560")  # Breiter für den Sequenz-Editor
         self.root.resizable(False, False)
 
         self.running = False
+        self.stop_event = None
+        self.scheduler = None
+        self.jitter_after_id = None
+        self.settings_queue = None
+        self.published_settings = None
         self.clicker_thread = None
         self.config_file = "autoclicker_config.json"
+        self.sequence = []  # Ziele der Klicksequenz (Target)
 
         # Monitor auswählen
         self.monitors = get_monitors()
@@ -33,6 +204,7 @@ class AutoClickerApp:
 
         self.create_widgets()
         self.load_last_position()  # Beim Start die letzte Position laden
+        self.load_last_profile()
         self.update_preview()
 
     def show_help(self):
@@ -43,6 +215,10 @@ class AutoClickerApp:
 3. Klickintervall: Stelle die Zeit zwischen den Klicks ein (in Sekunden).
 4. Start/Stop: Starte und stoppe den Autoclicker.
 5. Position speichern/laden: Speichere die aktuelle Position oder lade eine zuvor gespeicherte.
+6. Klicksequenz: Füge die eingestellte Position mit eigener Verzögerung und Anzahl an Wiederholungen
+   als Ziel hinzu. Die Ziele werden der Reihe nach angeklickt, danach beginnt die Sequenz von vorn.
+   Sequenzen lassen sich unter einem Namen als Profil speichern und wieder laden.
+   Ist die Sequenz leer, wird nur die eingestellte Position im Klickintervall angeklickt.
 
 Problembehebung:
 - Wenn der Klick nicht an der erwarteten Position erfolgt, überprüfe die Monitor-Konfiguration.
@@ -52,16 +228,17 @@ Problembehebung:
 
     def save_last_position(self):
         """Speichert die aktuelle Position und Monitorauswahl in einer Konfigurationsdatei"""
-        config = {
+        # Gespeicherte Profile in der Datei erhalten
+        config = read_config(self.config_file)
+        config.update({
             "monitor": self.monitor_var.get(),
             "x_position": self.x_position.get(),
             "y_position": self.y_position.get(),
             "interval": self.interval_var.get()
-        }
+        })
 
         try:
-            with open(self.config_file, "w") as file:
-                json.dump(config, file)
+            write_config(self.config_file, config)
             messagebox.showinfo("Position gespeichert",
                                 f"Die aktuelle Position wurde erfolgreich gespeichert.")
         except Exception as e:
@@ -70,13 +247,11 @@ Problembehebung:
 
     def load_last_position(self):
         """Lädt die zuletzt gespeicherte Position, wenn verfügbar"""
-        if not os.path.exists(self.config_file):
-            return  # Keine Konfigurationsdatei gefunden
+        config = read_config(self.config_file)
+        if "x_position" not in config:
+            return  # Keine gespeicherte Position gefunden
 
         try:
-            with open(self.config_file, "r") as file:
-                config = json.load(file)
-
             # Überprüfen, ob der gespeicherte Monitor noch existiert
             if config["monitor"] in self.monitor_info:
                 self.monitor_var.set(config["monitor"])
@@ -225,16 +400,26 @@ Problembehebung:
 
         self.interval_entry = ttk.Entry(interval_frame, textvariable=self.interval_var, width=5)
         self.interval_entry.pack(side=tk.LEFT, padx=5)
+        self.interval_var.trace_add("write", lambda *args: self.publish_settings())
 
         # Preview-Bereich
         ttk.Label(main_frame, text="Klick-Position Vorschau:").grid(row=4, column=0, sticky=tk.W, pady=10)
         self.preview_canvas = tk.Canvas(main_frame, width=300, height=150, bg="lightgray", bd=2, relief=tk.SUNKEN)
         self.preview_canvas.grid(row=5, column=0, columnspan=2, pady=5)
 
+        # Klicksequenz mit mehreren Zielen
+        sequence_frame = ttk.LabelFrame(main_frame, text="Klicksequenz")
+        sequence_frame.grid(row=0, column=3, rowspan=10, padx=10, pady=5, sticky=tk.NS)
+        self.create_sequence_widgets(sequence_frame)
+
         # Koordinaten-Anzeige
         self.coord_label = ttk.Label(main_frame, text="Koordinaten: (0, 0)")
         self.coord_label.grid(row=6, column=0, columnspan=2, pady=5)
 
+        # Taktgenauigkeit des laufenden Autoclickers
+        self.jitter_label = ttk.Label(main_frame, text="Taktgenauigkeit: -")
+        self.jitter_label.grid(row=9, column=0, columnspan=3, pady=5)
+
         # Speichern/Laden Buttons
         save_load_frame = ttk.Frame(main_frame)
         save_load_frame.grid(row=7, column=0, columnspan=2, pady=5)
@@ -257,7 +442,197 @@ Problembehebung:
         ttk.Button(button_frame, text="Aktuelle Mausposition", command=self.show_current_mouse_pos).pack(side=tk.LEFT,
                                                                                                          padx=10)
 
+    def create_sequence_widgets(self, frame):
+        """Editor für die Ziele der Klicksequenz und die gespeicherten Profile"""
+        columns = ("monitor", "x", "y", "delay", "repeat")
+        headings = ("Monitor", "X (%)", "Y (%)", "Verzögerung (s)", "Wiederh.")
+        self.sequence_tree = ttk.Treeview(frame, columns=columns, show="headings", height=10, selectmode="browse")
+        for column, heading, width in zip(columns, headings, (80, 55, 55, 95, 60)):
+            self.sequence_tree.heading(column, text=heading)
+            self.sequence_tree.column(column, width=width, anchor=tk.CENTER)
+        self.sequence_tree.grid(row=0, column=0, columnspan=4, padx=5, pady=5)
+        self.sequence_tree.bind("<<TreeviewSelect>>", self.select_target)
+
+        # Verzögerung und Wiederholungen für das nächste Ziel
+        ttk.Label(frame, text="Verzögerung (s):").grid(row=1, column=0, sticky=tk.W, padx=5)
+        self.delay_var = tk.DoubleVar(value=1.0)
+        ttk.Entry(frame, textvariable=self.delay_var, width=6).grid(row=1, column=1, sticky=tk.W)
+        ttk.Label(frame, text="Wiederholungen:").grid(row=1, column=2, sticky=tk.W, padx=5)
+        self.repeat_var = tk.IntVar(value=1)
+        ttk.Spinbox(frame, from_=1, to=10000, textvariable=self.repeat_var, width=6).grid(row=1, column=3,
+                                                                                        sticky=tk.W)
+
+        edit_frame = ttk.Frame(frame)
+        edit_frame.grid(row=2, column=0, columnspan=4, pady=5)
+        ttk.Button(edit_frame, text="Ziel hinzufügen", command=self.add_target).pack(side=tk.LEFT, padx=2)
+        ttk.Button(edit_frame, text="Ziel ändern", command=self.update_target).pack(side=tk.LEFT, padx=2)
+        ttk.Button(edit_frame, text="Entfernen", command=self.remove_target).pack(side=tk.LEFT, padx=2)
+        ttk.Button(edit_frame, text="▲", width=2, command=lambda: self.move_target(-1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(edit_frame, text="▼", width=2, command=lambda: self.move_target(1)).pack(side=tk.LEFT, padx=2)
+
+        # Profile
+        ttk.Label(frame, text="Profil:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        self.profile_var = tk.StringVar()
+        self.profile_combo = ttk.Combobox(frame, textvariable=self.profile_var, width=22)
+        self.profile_combo.grid(row=3, column=1, columnspan=3, sticky=tk.W, pady=5)
+        self.profile_combo.bind("<<ComboboxSelected>>", self.load_profile)
+
+        profile_frame = ttk.Frame(frame)
+        profile_frame.grid(row=4, column=0, columnspan=4, pady=5)
+        ttk.Button(profile_frame, text="Profil speichern", command=self.save_profile).pack(side=tk.LEFT, padx=2)
+        ttk.Button(profile_frame, text="Profil laden", command=self.load_profile).pack(side=tk.LEFT, padx=2)
+        ttk.Button(profile_frame, text="Profil löschen", command=self.delete_profile).pack(side=tk.LEFT, padx=2)
+
+        ttk.Label(frame, text="Ist die Sequenz leer, wird die eingestellte Position\n"
+                              "im Klickintervall angeklickt.", justify=tk.LEFT).grid(row=5, column=0, columnspan=4,
+                                                                                     sticky=tk.W, padx=5, pady=5)
+
+    def read_target_input(self):
+        """Ziel aus Monitor, Position, Verzögerung und Wiederholungen der Eingabefelder"""
+        try:
+            return target_from_dict({
+                "monitor": self.monitor_var.get(),
+                "x_percent": self.x_position.get(),
+                "y_percent": self.y_position.get(),
+                "delay": self.delay_var.get(),
+                "repeat": self.repeat_var.get(),
+            })
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Ungültiges Ziel", str(e))
+            return None
+
+    def selected_target(self):
+        selection = self.sequence_tree.selection()
+        return self.sequence_tree.index(selection[0]) if selection else None
+
+    def refresh_sequence(self, select=None):
+        """Zeichnet die Zielliste neu und markiert optional ein Ziel"""
+        self.sequence_tree.delete(*self.sequence_tree.get_children())
+        for target in self.sequence:
+            self.sequence_tree.insert("", tk.END, values=(target.monitor, f"{target.x_percent:.2f}",
+                                                          f"{target.y_percent:.2f}", f"{target.delay:g}",
+                                                          target.repeat))
+        if select is not None and 0 <= select < len(self.sequence):
+            self.sequence_tree.selection_set(self.sequence_tree.get_children()[select])
+        self.update_preview()
+
+    def select_target(self, event=None):
+        """Übernimmt das ausgewählte Ziel in die Eingabefelder"""
+        index = self.selected_target()
+        if index is None:
+            return
+        target = self.sequence[index]
+        if target.monitor in self.monitor_info:
+            self.monitor_var.set(target.monitor)
+        self.x_position.set(target.x_percent)
+        self.y_position.set(target.y_percent)
+        self.delay_var.set(target.delay)
+        self.repeat_var.set(target.repeat)
+        self.update_entry_from_sliders()
+        self.update_preview()
+
+    def add_target(self):
+        target = self.read_target_input()
+        if target:
+            self.sequence.append(target)
+            self.refresh_sequence(len(self.sequence) - 1)
+
+    def update_target(self):
+        index = self.selected_target()
+        if index is None:
+            messagebox.showinfo("Ziel ändern", "Bitte zuerst ein Ziel in der Liste auswählen.")
+            return
+        target = self.read_target_input()
+        if target:
+            self.sequence[index] = target
+            self.refresh_sequence(index)
+
+    def remove_target(self):
+        index = self.selected_target()
+        if index is None:
+            return
+        del self.sequence[index]
+        self.refresh_sequence(min(index, len(self.sequence) - 1))
+
+    def move_target(self, offset):
+        index = self.selected_target()
+        if index is None or not 0 <= index + offset < len(self.sequence):
+            return
+        self.sequence[index], self.sequence[index + offset] = self.sequence[index + offset], self.sequence[index]
+        self.refresh_sequence(index + offset)
+
+    def refresh_profiles(self, config):
+        self.profile_combo["values"] = sorted(config.get("profiles", {}))
+
+    def save_profile(self):
+        """Speichert die Sequenz unter dem eingegebenen Namen in der Konfigurationsdatei"""
+        name = self.profile_var.get().strip()
+        if not name:
+            messagebox.showerror("Fehler", "Bitte einen Profilnamen eingeben.")
+            return
+
+        config = read_config(self.config_file)
+        config.setdefault("profiles", {})[name] = [target._asdict() for target in self.sequence]
+        config["last_profile"] = name
+        try:
+            write_config(self.config_file, config)
+        except OSError as e:
+            messagebox.showerror("Fehler beim Speichern", f"Das Profil konnte nicht gespeichert werden:\n{e}")
+            return
+        self.refresh_profiles(config)
+        messagebox.showinfo("Profil gespeichert", f"Profil '{name}' mit {len(self.sequence)} Zielen gespeichert.")
+
+    def load_profile(self, event=None, name=None, quiet=False):
+        """Lädt die Sequenz eines gespeicherten Profils"""
+        name = name or self.profile_var.get().strip()
+        config = read_config(self.config_file)
+        profiles = config.get("profiles", {})
+        try:
+            sequence = [target_from_dict(data) for data in profiles[name]]
+        except KeyError:
+            if not quiet:
+                messagebox.showerror("Fehler", f"Profil '{name}' nicht gefunden.")
+            return
+        except (TypeError, ValueError) as e:
+            print(f"Profil '{name}' ist ungültig: {e}")
+            if not quiet:
+                messagebox.showerror("Fehler beim Laden", f"Profil '{name}' ist ungültig:\n{e}")
+            return
+
+        self.sequence = sequence
+        self.profile_var.set(name)
+        self.refresh_sequence()
+
+    def load_last_profile(self):
+        """Stellt beim Start das zuletzt gespeicherte Profil wieder her"""
+        config = read_config(self.config_file)
+        self.refresh_profiles(config)
+        if config.get("last_profile"):
+            self.load_profile(name=config["last_profile"], quiet=True)
+
+    def delete_profile(self):
+        name = self.profile_var.get().strip()
+        config = read_config(self.config_file)
+        profiles = config.get("profiles", {})
+        if name not in profiles:
+            messagebox.showerror("Fehler", f"Profil '{name}' nicht gefunden.")
+            return
+        if not messagebox.askyesno("Profil löschen", f"Profil '{name}' wirklich löschen?"):
+            return
+
+        del profiles[name]
+        if config.get("last_profile") == name:
+            del config["last_profile"]
+        try:
+            write_config(self.config_file, config)
+        except OSError as e:
+            messagebox.showerror("Fehler beim Speichern", f"Das Profil konnte nicht gelöscht werden:\n{e}")
+            return
+        self.profile_var.set("")
+        self.refresh_profiles(config)
+
     def update_preview(self, event=None):
+        self.publish_settings()
         monitor_key = self.monitor_var.get()
         if not monitor_key:
             return
@@ -274,6 +649,17 @@ Problembehebung:
         monitor_info_text = f"Monitor: {monitor.width}x{monitor.height}, Position: ({monitor.x}, {monitor.y})"
         self.preview_canvas.create_text(150, 25, text=monitor_info_text, fill="blue", font=("Arial", 8))
 
+        # Ziele der Sequenz auf diesem Monitor markieren
+        for number, target in enumerate(self.sequence, 1):
+            if target.monitor != monitor_key:
+                continue
+            target_x = 10 + target.x_percent / 100 * 280
+            target_y = 10 + target.y_percent / 100 * 130
+            self.preview_canvas.create_oval(target_x - 4, target_y - 4, target_x + 4, target_y + 4, outline="blue",
+                                            width=2)
+            self.preview_canvas.create_text(target_x + 9, target_y - 9, text=str(number), fill="blue",
+                                            font=("Arial", 8))
+
         # Klickposition zeichnen
         x_percent = self.x_position.get() / 100
         y_percent = self.y_position.get() / 100
@@ -288,8 +674,7 @@ Problembehebung:
                                         outline="")
 
         # Echte Koordinaten berechnen
-        real_x = int(monitor.x + monitor.width * x_percent)
-        real_y = int(monitor.y + monitor.height * y_percent)
+        real_x, real_y = absolute_position(monitor, self.x_position.get(), self.y_position.get())
 
         self.coord_label.config(text=f"Koordinaten: ({real_x}, {real_y})")
 
@@ -297,82 +682,97 @@ Problembehebung:
         monitor_info_text = f"Breite: {monitor.width}px\nHöhe: {monitor.height}px\nPosition: ({monitor.x}, {monitor.y})"
         self.monitor_info_label.config(text=monitor_info_text)
 
-    def clicker_function(self):
-        monitor_key = self.monitor_var.get()
-        if not monitor_key:
-            messagebox.showerror("Fehler", "Kein Monitor ausgewählt!")
-            self.toggle_clicker()
-            return
-
-        monitor = self.monitor_info[monitor_key]
-
-        # Debug-Ausgabe für Monitor-Info
-        print(f"Monitor Info: {monitor_key}")
-        print(f"- Auflösung: {monitor.width}x{monitor.height}")
-        print(f"- Position: ({monitor.x}, {monitor.y})")
-        print(f"- Weitere Eigenschaften: {dir(monitor)}")
+    def snapshot_settings(self):
+        """Liest die Einstellungen im Tk-Hauptthread und friert sie für den Klick-Thread ein.
 
-        while self.running:
-            x_percent = self.x_position.get() / 100
-            y_percent = self.y_position.get() / 100
-
-            # Absolute Koordinaten für den ausgewählten Monitor berechnen
-            click_x = int(monitor.x + monitor.width * x_percent)
-            click_y = int(monitor.y + monitor.height * y_percent)
-
-            try:
-                # Debug-Ausgabe für den Klick
-                print(f"Klicke bei {x_percent * 100}%, {y_percent * 100}% des Monitors")
-                print(f"Absolute Koordinaten: ({click_x}, {click_y})")
-
-                # Klick ausführen
-                pyautogui.click(click_x, click_y)
-
-                # Warten für das eingestellte Intervall
-                interval = self.interval_var.get()
-                # Kurze Intervalle für responsives Beenden
-                if interval > 0.5:
-                    for _ in range(int(interval * 2)):
-                        if not self.running:
-                            break
-                        time.sleep(0.5)
-                else:
-                    time.sleep(interval)
-            except Exception as e:
-                print(f"Fehler beim Klicken: {e}")
-                messagebox.showerror("Fehler beim Klicken", str(e))
-                self.running = False
-                break
+        Die Sequenz wird verwendet, wenn sie Ziele enthält, sonst die eingestellte Position im Klickintervall.
+        """
+        if self.sequence:
+            plan = build_click_plan(self.sequence, self.monitor_info)
+            description = f"Sequenz mit {len(self.sequence)} Zielen ({len(plan)} Klicks pro Durchlauf)"
+        else:
+            if not self.monitor_var.get():
+                raise ValueError("Kein Monitor ausgewählt!")
+            target = Target(self.monitor_var.get(), self.x_position.get(), self.y_position.get(),
+                            self.interval_var.get(), 1)
+            plan = build_click_plan([target], self.monitor_info)
+            click_x, click_y, interval = plan[0]
+            description = f"({click_x}, {click_y}) auf {target.monitor} alle {interval} Sekunden"
+        return ClickSettings(tuple(plan), description)
+
+    def publish_settings(self):
+        """Reicht geänderte Einstellungen an den laufenden Klick-Thread weiter"""
+        if not self.running:
+            return
+        try:
+            settings = self.snapshot_settings()
+        except (ValueError, tk.TclError):
+            return  # Unvollständige Eingabe: der Klick-Thread behält den letzten gültigen Stand
+        if settings != self.published_settings:
+            self.published_settings = settings
+            self.settings_queue.put(settings)
+
+    def report_click_error(self, error):
+        """Wird per root.after im Tk-Hauptthread aufgerufen, wenn der Klick-Thread abbricht"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_event.set()
+        self.cancel_jitter_updates()
+        self.start_button.config(text="Start")
+        messagebox.showerror("Fehler beim Klicken", str(error))
 
     def toggle_clicker(self):
         if not self.running:
-            # Aktuelle Position anzeigen
-            monitor_key = self.monitor_var.get()
-            if not monitor_key:
-                messagebox.showerror("Fehler", "Kein Monitor ausgewählt!")
+            try:
+                settings = self.snapshot_settings()
+            except (ValueError, tk.TclError) as e:
+                messagebox.showerror("Fehler", str(e))
                 return
 
-            monitor = self.monitor_info[monitor_key]
-            x_percent = self.x_position.get() / 100
-            y_percent = self.y_position.get() / 100
-            click_x = int(monitor.x + monitor.width * x_percent)
-            click_y = int(monitor.y + monitor.height * y_percent)
-
-            messagebox.showinfo("Autoclicker gestartet",
-                                f"Der Autoclicker wird bei ({click_x}, {click_y}) auf {monitor_key}\n"
-                                f"mit einem Intervall von {self.interval_var.get()} Sekunden starten.")
+            messagebox.showinfo("Autoclicker gestartet", f"Der Autoclicker startet: {settings.description}.")
 
+            # Pro Lauf eigene Queue und eigenes Stop-Signal, damit ein noch auslaufender Thread nichts übernimmt
             self.running = True
+            self.stop_event = threading.Event()
+            self.settings_queue = queue.Queue()
+            self.published_settings = settings
+            self.settings_queue.put(settings)
+            self.scheduler = ClickScheduler(settings.plan[0][2], self.stop_event)
             self.start_button.config(text="Stop")
-            self.clicker_thread = threading.Thread(target=self.clicker_function)
+            self.clicker_thread = threading.Thread(
+                target=run_clicks,
+                args=(self.settings_queue, self.scheduler, pyautogui.click,
+                      lambda error: self.root.after(0, self.report_click_error, error)))
             self.clicker_thread.daemon = True
             self.clicker_thread.start()
+            self.cancel_jitter_updates()
+            self.update_jitter_label()
         else:
             self.running = False
+            self.stop_event.set()
+            self.cancel_jitter_updates()
             self.start_button.config(text="Start")
             # Automatisch die letzte Position speichern, wenn der Clicker gestoppt wird
             self.save_last_position()
 
+    def update_jitter_label(self):
+        """Zeigt die gemessene Abweichung vom Klicktakt an, solange der Autoclicker läuft."""
+        stats = self.scheduler.stats() if self.scheduler else None
+        if stats:
+            text = (f"Taktgenauigkeit ({stats['count']} Klicks): Ø {stats['mean_ms']:.1f} ms, "
+                    f"max {stats['max_ms']:.1f} ms, σ {stats['stdev_ms']:.1f} ms")
+            if stats["skipped"]:
+                text += f", {stats['skipped']} Takte ausgelassen"
+            self.jitter_label.config(text=text)
+        self.jitter_after_id = self.root.after(500, self.update_jitter_label) if self.running else None
+
+    def cancel_jitter_updates(self):
+        """Beendet die laufende Aktualisierung der Taktanzeige, damit nach einem Neustart nur eine aktiv ist"""
+        if self.jitter_after_id is not None:
+            self.root.after_cancel(self.jitter_after_id)
+            self.jitter_after_id = None
+
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -14,8 +14,15 @@
 
 import numpy as np
 import webbrowser
+import argparse
+import collections
+import concurrent.futures
 import os
 import ctypes
+import mmap
+import random
+import struct
+import time
 
 # Function to play Rick Roll song
 def play_rick_roll():
@@ -37,6 +44,125 @@ def disable_close_button():
 ROW_COUNT = 6
 COLUMN_COUNT = 7
 
+# Bitboard-Layout: jede Spalte belegt 7 Bits (6 Zeilen + 1 leeres Trennbit), Bit = Spalte * 7 + Zeile.
+# Durch das Trennbit laufen Verschiebungen nicht von einer Spalte in die nächste über.
+COLUMN_BITS = ROW_COUNT + 1
+BOTTOM_MASK = sum(1 << (c * COLUMN_BITS) for c in range(COLUMN_COUNT))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROW_COUNT) - 1)
+# Verschiebungen für senkrecht, waagerecht und die beiden Diagonalen
+DIRECTIONS = (1, COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1)
+
+# Zobrist-Schlüssel: eine Zufallszahl pro Spieler und Feld, fester Seed für reproduzierbare Hashes
+_zobrist_random = random.Random(4)
+ZOBRIST = [[_zobrist_random.getrandbits(64) for _ in range(COLUMN_COUNT * COLUMN_BITS)] for _ in range(3)]
+ZOBRIST_SIDE = [0, _zobrist_random.getrandbits(64), _zobrist_random.getrandbits(64)]
+
+
+def has_four(bits):
+    """True, wenn die Bitmaske vier zusammenhängende Steine in irgendeiner Richtung enthält."""
+    for shift in DIRECTIONS:
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+class BitBoard:
+    """Spielfeld als zwei Bitmasken (eine pro Spieler) plus Füllhöhe jeder Spalte.
+
+    Zugprüfung, Zug, Rücknahme und Gewinnprüfung kommen ohne Schleifen über das Feld aus.
+    """
+
+    def __init__(self):
+        self.bits = [0, 0, 0]  # Index 1 und 2 entsprechen den Spielern, Index 0 bleibt leer
+        self.heights = [0] * COLUMN_COUNT
+        self.moves = 0
+        self.hash = 0
+
+    @classmethod
+    def from_array(cls, board):
+        bitboard = cls()
+        for c in range(COLUMN_COUNT):
+            for r in range(ROW_COUNT):
+                piece = int(board[r][c])
+                if piece:
+                    bitboard.bits[piece] |= 1 << (c * COLUMN_BITS + r)
+                    bitboard.hash ^= ZOBRIST[piece][c * COLUMN_BITS + r]
+                    bitboard.heights[c] = r + 1
+                    bitboard.moves += 1
+        return bitboard
+
+    def to_array(self):
+        board = create_board()
+        for piece in (1, 2):
+            for c in range(COLUMN_COUNT):
+                for r in range(self.heights[c]):
+                    if self.bits[piece] >> (c * COLUMN_BITS + r) & 1:
+                        board[r][c] = piece
+        return board
+
+    def can_play(self, col):
+        return self.heights[col] < ROW_COUNT
+
+    def next_row(self, col):
+        return self.heights[col] if self.heights[col] < ROW_COUNT else None
+
+    def play(self, col, piece):
+        """Setzt einen Stein in die Spalte und gibt die belegte Zeile zurück."""
+        row = self.heights[col]
+        self.bits[piece] |= 1 << (col * COLUMN_BITS + row)
+        self.hash ^= ZOBRIST[piece][col * COLUMN_BITS + row]
+        self.heights[col] = row + 1
+        self.moves += 1
+        return row
+
+    def undo(self, col):
+        """Nimmt den obersten Stein der Spalte zurück."""
+        self.heights[col] -= 1
+        self.moves -= 1
+        position = col * COLUMN_BITS + self.heights[col]
+        piece = 1 if self.bits[1] >> position & 1 else 2
+        self.bits[piece] &= ~(1 << position)
+        self.hash ^= ZOBRIST[piece][position]
+
+    def is_win(self, piece):
+        return has_four(self.bits[piece])
+
+    def is_winning_move(self, col, piece):
+        """True, wenn der Zug in diese Spalte sofort gewinnt (ohne ihn auszuführen)."""
+        return has_four(self.bits[piece] | 1 << (col * COLUMN_BITS + self.heights[col]))
+
+    def is_full(self):
+        return self.moves == ROW_COUNT * COLUMN_COUNT
+
+    def copy(self):
+        bitboard = BitBoard()
+        bitboard.bits = list(self.bits)
+        bitboard.heights = list(self.heights)
+        bitboard.moves = self.moves
+        bitboard.hash = self.hash
+        return bitboard
+
+    def key(self, piece):
+        """Eindeutiger Schlüssel der Stellung mit piece am Zug (passt in 64 Bit)."""
+        return self.bits[piece] + (self.bits[1] | self.bits[2]) + BOTTOM_MASK
+
+    def mirrored(self):
+        """Spiegelbild der Stellung an der mittleren Spalte."""
+        bitboard = BitBoard()
+        for piece in (1, 2):
+            for c in range(COLUMN_COUNT):
+                column = self.bits[piece] >> (c * COLUMN_BITS) & ((1 << COLUMN_BITS) - 1)
+                bitboard.bits[piece] |= column << ((COLUMN_COUNT - 1 - c) * COLUMN_BITS)
+        bitboard.heights = self.heights[::-1]
+        bitboard.moves = self.moves
+        bitboard.hash = BitBoard.from_array(bitboard.to_array()).hash
+        return bitboard
+
+
+# Die folgenden Funktionen bleiben als Kompatibilitätsschicht erhalten und akzeptieren
+# sowohl ein BitBoard als auch das bisherige 6x7-NumPy-Array.
+
 # Erstellen des Spielfelds
 def create_board():
     board = np.zeros((ROW_COUNT, COLUMN_COUNT), dtype=int)
@@ -44,47 +170,574 @@ def create_board():
 
 # Spielfeld anzeigen
 def print_board(board):
+    if isinstance(board, BitBoard):
+        board = board.to_array()
     print(np.flip(board, 0))
 
 # Überprüfen, ob ein Zug gültig ist
 def is_valid_location(board, col):
+    if isinstance(board, BitBoard):
+        return board.can_play(col)
     return board[ROW_COUNT - 1][col] == 0
 
 # Den nächsten freien Platz in einer Spalte finden
 def get_next_open_row(board, col):
+    if isinstance(board, BitBoard):
+        return board.next_row(col)
     for r in range(ROW_COUNT):
         if board[r][col] == 0:
             return r
 
 # Überprüfen, ob ein Spieler gewonnen hat
 def winning_move(board, piece):
-    # Horizontale, vertikale und diagonale Überprüfungen
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-                return True
+    if not isinstance(board, BitBoard):
+        board = BitBoard.from_array(board)
+    return board.is_win(piece)
+
+# Gewinnprüfung für viele Spielfelder auf einmal (Analyse, Trainingsdaten)
+
+def _has_four_batch(cells):
+    # cells: (N, 6, 7) bool; jede Richtung als UND über vier gegeneinander verschobene Ansichten
+    horizontal = cells[:, :, :-3] & cells[:, :, 1:-2] & cells[:, :, 2:-1] & cells[:, :, 3:]
+    vertical = cells[:, :-3, :] & cells[:, 1:-2, :] & cells[:, 2:-1, :] & cells[:, 3:, :]
+    diagonal = cells[:, :-3, :-3] & cells[:, 1:-2, 1:-2] & cells[:, 2:-1, 2:-1] & cells[:, 3:, 3:]
+    anti_diagonal = cells[:, 3:, :-3] & cells[:, 2:-1, 1:-2] & cells[:, 1:-2, 2:-1] & cells[:, :-3, 3:]
+    return (horizontal.any(axis=(1, 2)) | vertical.any(axis=(1, 2))
+            | diagonal.any(axis=(1, 2)) | anti_diagonal.any(axis=(1, 2)))
+
 
+def winning_moves_batch(boards, chunk_size=65536):
+    """Gewinnprüfung für ein (N, 6, 7)-Array von Spielfeldern.
+
+    Liefert ein (N, 2)-Bool-Array: Spalte 0 für Spieler 1, Spalte 1 für Spieler 2.
+    Große Stapel werden in Blöcken von chunk_size verarbeitet, um den Speicherbedarf zu begrenzen.
+    """
+    boards = np.asarray(boards)
+    if boards.ndim != 3 or boards.shape[1:] != (ROW_COUNT, COLUMN_COUNT):
+        raise ValueError(f"Erwartet (N, {ROW_COUNT}, {COLUMN_COUNT}), erhalten {boards.shape}")
+    wins = np.zeros((len(boards), 2), dtype=bool)
+    for start in range(0, len(boards), chunk_size):
+        chunk = boards[start:start + chunk_size]
+        wins[start:start + chunk_size, 0] = _has_four_batch(chunk == 1)
+        wins[start:start + chunk_size, 1] = _has_four_batch(chunk == 2)
+    return wins
+
+
+# Computergegner: Negamax mit Alpha-Beta-Suche, iterativer Vertiefung und Transpositionstabelle
+
+# Spalten von der Mitte nach außen, da mittlere Züge an den meisten Viererreihen beteiligt sind
+CENTER_ORDER = sorted(range(COLUMN_COUNT), key=lambda c: abs(COLUMN_COUNT // 2 - c))
+# Gewinnbewertung: WIN_SCORE minus Anzahl Steine, schnellere Siege sind also mehr wert
+WIN_SCORE = 1_000_000
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+
+def _window_masks():
+    # Bitmasken aller 69 möglichen Viererreihen
+    masks = []
     for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-                return True
+        for r in range(ROW_COUNT):
+            for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                cells = [(c + i * dc, r + i * dr) for i in range(4)]
+                if all(0 <= x < COLUMN_COUNT and 0 <= y < ROW_COUNT for x, y in cells):
+                    masks.append(sum(1 << (x * COLUMN_BITS + y) for x, y in cells))
+    return masks
 
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-                return True
 
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(3, ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-                return True
+WINDOW_MASKS = _window_masks()
+WINDOW_WEIGHTS = (0, 1, 4, 16)
+CENTER_MASK = ((1 << ROW_COUNT) - 1) << (COLUMN_COUNT // 2 * COLUMN_BITS)
 
-    return False
+
+def evaluate(board, piece):
+    """Heuristische Bewertung aus Sicht von piece: offene Viererreihen, gewichtet nach eigenen Steinen."""
+    own, opponent = board.bits[piece], board.bits[3 - piece]
+    score = 3 * ((own & CENTER_MASK).bit_count() - (opponent & CENTER_MASK).bit_count())
+    for mask in WINDOW_MASKS:
+        own_cells = own & mask
+        opponent_cells = opponent & mask
+        if not opponent_cells:
+            score += WINDOW_WEIGHTS[own_cells.bit_count()]
+        elif not own_cells:
+            score -= WINDOW_WEIGHTS[opponent_cells.bit_count()]
+    return score
+
+
+class TranspositionTable:
+    """Hashtabelle fester Größe für bereits bewertete Stellungen.
+
+    Jeder Zobrist-Schlüssel hat genau einen Platz (Schlüssel modulo Größe). Ein belegter Platz
+    wird überschrieben, wenn der Eintrag aus einer früheren Suche stammt oder die neue
+    Bewertung mindestens so tief gerechnet wurde.
+    """
+
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def get(self, key):
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key % self.size
+        old = self.slots[index]
+        if old is None or old[0] == key or old[5] != self.generation or depth >= old[1]:
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+# Endspiel-Löser: bei wenigen freien Feldern wird bis zum Spielende gerechnet
+ENDGAME_CELLS = 16
+
+
+class EndgameSolver:
+    """Exakte Alpha-Beta-Suche bis zum Spielende mit Zwischenspeicher.
+
+    Ergebnisse werden als exakter Wert oder Schranke pro Stellungsschlüssel gemerkt und bleiben
+    über mehrere Züge erhalten, sodass die Folgezüge einer Partie meist sofort feststehen.
+    """
+
+    def __init__(self, max_entries=1 << 20):
+        self.max_entries = max_entries
+        self.cache = {}
+        self.nodes = 0
+
+    def best_move(self, board, piece):
+        """Liefert (beste Spalte, exakte Bewertung) für piece am Zug."""
+        self.nodes = 0
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = None
+        for col in CENTER_ORDER:
+            if not board.can_play(col):
+                continue
+            if board.is_winning_move(col, piece):
+                return col, WIN_SCORE - board.moves - 1
+            board.play(col, piece)
+            score = -self.solve(board, 3 - piece, -beta, -alpha)
+            board.undo(col)
+            if best_move is None or score > alpha:
+                alpha, best_move = score, col
+        return best_move, alpha
+
+    def solve(self, board, piece, alpha=-WIN_SCORE - 1, beta=WIN_SCORE + 1):
+        self.nodes += 1
+        moves = [c for c in CENTER_ORDER if board.can_play(c)]
+        if not moves:
+            return 0
+        for col in moves:
+            if board.is_winning_move(col, piece):
+                return WIN_SCORE - board.moves - 1
+
+        key = board.key(piece)
+        entry = self.cache.get(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT:
+                return value
+            if flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        original_alpha = alpha
+        best_score = -WIN_SCORE - 1
+        for col in moves:
+            board.play(col, piece)
+            score = -self.solve(board, 3 - piece, -beta, -alpha)
+            board.undo(col)
+            best_score = max(best_score, score)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if len(self.cache) >= self.max_entries:
+            self.cache.clear()
+        if best_score <= original_alpha:
+            self.cache[key] = (best_score, UPPER_BOUND)
+        elif best_score >= beta:
+            self.cache[key] = (best_score, LOWER_BOUND)
+        else:
+            self.cache[key] = (best_score, EXACT)
+        return best_score
+
+
+# Eröffnungsbuch: Binärdatei mit nach Schlüssel sortierten Einträgen, per mmap gelesen
+BOOK_FILE = "vier_gewinnt_book.bin"
+BOOK_HEADER = struct.Struct("<4sHI")  # Kennung, Version, Anzahl Einträge
+BOOK_RECORD = struct.Struct("<Qbi")  # Stellungsschlüssel, beste Spalte, Bewertung
+BOOK_MAGIC = b"VGOB"
+BOOK_VERSION = 1
+
+
+class OpeningBook:
+    """Liest ein mit build_opening_book erzeugtes Eröffnungsbuch.
+
+    Die Datei wird nur eingeblendet (mmap) und per Binärsuche durchsucht, also weder komplett
+    eingelesen noch in ein Dictionary umgewandelt. Gespiegelte Stellungen teilen sich einen Eintrag.
+    """
+
+    def __init__(self, path=BOOK_FILE):
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.count = BOOK_HEADER.unpack_from(self._data, 0)
+        except (ValueError, struct.error):
+            self._file.close()
+            raise ValueError(f"{path} ist kein gültiges Eröffnungsbuch")
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self.close()
+            raise ValueError(f"{path} ist kein gültiges Eröffnungsbuch")
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, move, score = BOOK_RECORD.unpack_from(self._data, BOOK_HEADER.size + middle * BOOK_RECORD.size)
+            if record_key == key:
+                return move, score
+            if record_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def lookup(self, board, piece):
+        """Liefert (beste Spalte, Bewertung) für piece am Zug oder None, wenn die Stellung fehlt."""
+        key = board.key(piece)
+        mirrored_key = board.mirrored().key(piece)
+        entry = self._find(min(key, mirrored_key))
+        if entry is None:
+            return None
+        move, score = entry
+        if mirrored_key < key:
+            move = COLUMN_COUNT - 1 - move
+        return move, score
+
+
+def _book_positions(ply):
+    # Alle nicht entschiedenen Stellungen bis ply Halbzüge, Spiegelbilder nur einmal
+    positions = {}
+    frontier = [BitBoard()]
+    for _ in range(ply + 1):
+        next_frontier = []
+        for board in frontier:
+            piece = 1 + board.moves % 2
+            key = board.key(piece)
+            canonical = min(key, board.mirrored().key(piece))
+            if canonical in positions:
+                continue
+            positions[canonical] = board if canonical == key else board.mirrored()
+            for col in range(COLUMN_COUNT):
+                if board.can_play(col) and not board.is_winning_move(col, piece):
+                    child = board.copy()
+                    child.play(col, piece)
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return positions
+
+
+def build_opening_book(path=BOOK_FILE, ply=4, depth=8):
+    """Bewertet alle Stellungen bis ply Halbzüge mit fester Suchtiefe und schreibt das Buch."""
+    positions = _book_positions(ply)
+    records = []
+    start = time.perf_counter()
+    for number, (key, board) in enumerate(sorted(positions.items()), 1):
+        piece = 1 + board.moves % 2
+        ai = AIPlayer(piece, time_limit=float("inf"), endgame_cells=0, max_depth=depth)
+        move = ai.choose_move(board)
+        records.append(BOOK_RECORD.pack(key, move, ai.last_score))
+        if number % 100 == 0:
+            print(f"{number}/{len(positions)} Stellungen bewertet ({time.perf_counter() - start:.1f} s)")
+
+    with open(path, "wb") as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(records)))
+        f.write(b"".join(records))
+    return len(records)
+
+
+class AIPlayer:
+    """Computerspieler mit fester Bedenkzeit pro Zug.
+
+    Mit Eröffnungsbuch werden bekannte Stellungen ohne Suche beantwortet; sind höchstens
+    endgame_cells Felder frei, wird die Stellung vom Endspiel-Löser exakt gelöst.
+    """
+
+    def __init__(self, piece, time_limit=0.5, table_size=1 << 18, book=None, endgame_cells=ENDGAME_CELLS,
+                 max_depth=None):
+        self.piece = piece
+        self.time_limit = time_limit
+        self.table = TranspositionTable(table_size)
+        self.book = book
+        self.endgame_cells = endgame_cells
+        self.solver = EndgameSolver()
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.last_depth = 0
+        self.last_score = 0
+        self.last_source = None
+        self._deadline = None
+
+    def choose_move(self, board):
+        """Sucht mit iterativer Vertiefung, bis die Zeit abläuft, und liefert die beste Spalte."""
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_array(board)
+        board = board.copy()
+        self.nodes = 0
+        moves = [c for c in CENTER_ORDER if board.can_play(c)]
+        for col in moves:
+            if board.is_winning_move(col, self.piece):
+                self.last_depth, self.last_score, self.last_source = 1, WIN_SCORE - board.moves - 1, "Suche"
+                return col
+
+        remaining = ROW_COUNT * COLUMN_COUNT - board.moves
+        if self.book is not None:
+            entry = self.book.lookup(board, self.piece)
+            if entry is not None:
+                best_move, self.last_score = entry
+                self.last_depth, self.last_source = 0, "Buch"
+                return best_move
+        if remaining <= self.endgame_cells:
+            best_move, self.last_score = self.solver.best_move(board, self.piece)
+            self.nodes, self.last_depth, self.last_source = self.solver.nodes, remaining, "Endspiel"
+            return best_move
+
+        self.table.new_search()
+        self.last_source = "Suche"
+        self._deadline = time.perf_counter() + self.time_limit
+        best_move = moves[0]
+        for depth in range(1, min(remaining, self.max_depth or remaining) + 1):
+            try:
+                score, move = self._search_root(board, depth, best_move)
+            except _SearchTimeout:
+                break
+            best_move, self.last_depth, self.last_score = move, depth, score
+            if abs(score) > WIN_SCORE - ROW_COUNT * COLUMN_COUNT - 1:
+                break  # Ergebnis steht fest, tiefer rechnen ändert nichts
+        return best_move
+
+    def _search_root(self, board, depth, previous_best):
+        moves = [c for c in CENTER_ORDER if board.can_play(c)]
+        moves.remove(previous_best)
+        moves.insert(0, previous_best)
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = previous_best
+        for col in moves:
+            board.play(col, self.piece)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 3 - self.piece)
+            board.undo(col)
+            if score > alpha:
+                alpha, best_move = score, col
+        return alpha, best_move
+
+    def _negamax(self, board, depth, alpha, beta, piece):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        moves = [c for c in CENTER_ORDER if board.can_play(c)]
+        if not moves:
+            return 0
+        for col in moves:
+            if board.is_winning_move(col, piece):
+                return WIN_SCORE - board.moves - 1
+        if depth <= 0:
+            return evaluate(board, piece)
+
+        key = board.hash ^ ZOBRIST_SIDE[piece]
+        original_alpha = alpha
+        entry = self.table.get(key)
+        if entry is not None:
+            _, entry_depth, value, flag, move, _ = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+            # Besten Zug aus einer früheren Suche zuerst probieren
+            moves.remove(move)
+            moves.insert(0, move)
+
+        best_score, best_move = -WIN_SCORE - 1, moves[0]
+        for col in moves:
+            board.play(col, piece)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 3 - piece)
+            board.undo(col)
+            if score > best_score:
+                best_score, best_move = score, col
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best_score, flag, best_move)
+        return best_score
+
+
+# Benchmark: Zuggenerierung (Perft) und Selbstspiel des Computergegners
+
+def perft(board, depth, piece=1):
+    """Zählt alle Stellungen nach genau depth Halbzügen; nach einem Sieg endet die Partie dort."""
+    if depth == 0:
+        return 1
+    count = 0
+    for col in range(COLUMN_COUNT):
+        if board.can_play(col):
+            if depth == 1:
+                count += 1
+                continue
+            board.play(col, piece)
+            if not board.is_win(piece):
+                count += perft(board, depth - 1, 3 - piece)
+            board.undo(col)
+    return count
+
+
+def self_play_game(seed, time_limit=0.05, opening_moves=2):
+    """Spielt eine Partie Computer gegen Computer nach zufälliger Eröffnung.
+
+    Liefert (Sieger oder 0 bei Unentschieden, Anzahl Züge, durchsuchte Stellungen, Suchzeit).
+    """
+    rng = random.Random(seed)
+    board = BitBoard()
+    players = {1: AIPlayer(1, time_limit), 2: AIPlayer(2, time_limit)}
+    nodes, search_time = 0, 0.0
+    piece = 1
+    while not board.is_full():
+        if board.moves < opening_moves:
+            col = rng.choice([c for c in range(COLUMN_COUNT) if board.can_play(c)])
+        else:
+            start = time.perf_counter()
+            col = players[piece].choose_move(board)
+            search_time += time.perf_counter() - start
+            nodes += players[piece].nodes
+        board.play(col, piece)
+        if board.is_win(piece):
+            return piece, board.moves, nodes, search_time
+        piece = 3 - piece
+    return 0, board.moves, nodes, search_time
+
+
+def run_self_play(games, workers=None, time_limit=0.05, opening_moves=2, seed=0):
+    """Verteilt die Partien auf einen Prozesspool; workers=1 spielt im eigenen Prozess."""
+    seeds = range(seed, seed + games)
+    start = time.perf_counter()
+    if workers == 1:
+        results = [self_play_game(s, time_limit, opening_moves) for s in seeds]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self_play_game, seeds, [time_limit] * games, [opening_moves] * games))
+    elapsed = time.perf_counter() - start
+
+    outcomes = collections.Counter(winner for winner, _, _, _ in results)
+    return {
+        "games": games,
+        "seconds": elapsed,
+        "games_per_second": games / elapsed,
+        "nodes_per_second": sum(r[2] for r in results) / max(sum(r[3] for r in results), 1e-9),
+        "results": {"Spieler 1": outcomes[1], "Spieler 2": outcomes[2], "Unentschieden": outcomes[0]},
+        "average_moves": sum(r[1] for r in results) / games,
+    }
+
+
+def run_benchmark(perft_depth=7, games=20, workers=None, time_limit=0.05, batch_positions=200_000):
+    for depth in range(1, perft_depth + 1):
+        start = time.perf_counter()
+        nodes = perft(BitBoard(), depth)
+        elapsed = time.perf_counter() - start
+        print(f"Perft({depth}): {nodes} Stellungen in {elapsed:.3f} s ({nodes / max(elapsed, 1e-9):,.0f} Stellungen/s)")
+
+    if batch_positions:
+        # Zufällig belegte Felder genügen zur Durchsatzmessung
+        boards = np.random.default_rng(0).integers(0, 3, size=(batch_positions, ROW_COUNT, COLUMN_COUNT),
+                                                   dtype=np.int8)
+        start = time.perf_counter()
+        wins = winning_moves_batch(boards)
+        elapsed = time.perf_counter() - start
+        print(f"Stapel-Gewinnprüfung: {batch_positions} Felder in {elapsed:.3f} s "
+              f"({batch_positions / elapsed:,.0f} Felder/s, {int(wins.any(axis=1).sum())} mit Viererreihe)")
+
+    if games:
+        summary = run_self_play(games, workers, time_limit)
+        print(f"Selbstspiel: {games} Partien in {summary['seconds']:.2f} s "
+              f"({summary['games_per_second']:.2f} Partien/s, Bedenkzeit {time_limit} s/Zug)")
+        print(f"Suche: {summary['nodes_per_second']:,.0f} Stellungen/s je Prozess, "
+              f"Mittel {summary['average_moves']:.1f} Züge pro Partie")
+        print("Ergebnisse: " + ", ".join(f"{name} {count}" for name, count in summary["results"].items()))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vier gewinnt im Terminal")
+    parser.add_argument("--computer", action="store_true", help="Spieler 2 wird vom Computer gespielt")
+    parser.add_argument("--time-limit", type=float,
+                        help="Bedenkzeit des Computers pro Zug in Sekunden (Standard: 0.5, Benchmark: 0.05)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Perft-Zählung und Selbstspiel ohne Spielfeldausgabe messen")
+    parser.add_argument("--perft-depth", type=int, default=7, help="Maximale Perft-Tiefe (Standard: 7)")
+    parser.add_argument("--games", type=int, default=20, help="Anzahl Selbstspiel-Partien (Standard: 20)")
+    parser.add_argument("--batch-positions", type=int, default=200_000,
+                        help="Anzahl Felder für die Stapel-Gewinnprüfung (Standard: 200000)")
+    parser.add_argument("--workers", type=int, help="Anzahl Prozesse (Standard: Anzahl CPU-Kerne)")
+    parser.add_argument("--book", default=BOOK_FILE,
+                        help=f"Eröffnungsbuch des Computers, falls vorhanden (Standard: {BOOK_FILE})")
+    parser.add_argument("--build-book", action="store_true",
+                        help="Eröffnungsbuch berechnen und unter --book speichern")
+    parser.add_argument("--book-ply", type=int, default=4, help="Halbzüge im Eröffnungsbuch (Standard: 4)")
+    parser.add_argument("--book-depth", type=int, default=8,
+                        help="Suchtiefe für die Bewertung der Buchstellungen (Standard: 8)")
+    return parser.parse_args()
 
 # Hauptspiel-Loop
 def main():
+    args = parse_args()
+    if args.benchmark:
+        run_benchmark(args.perft_depth, args.games, args.workers, args.time_limit or 0.05, args.batch_positions)
+        return
+    if args.build_book:
+        count = build_opening_book(args.book, args.book_ply, args.book_depth)
+        print(f"Eröffnungsbuch mit {count} Stellungen gespeichert: {args.book}")
+        return
     disable_close_button()  # Disable window close button at start
-    board = create_board()
+    board = BitBoard()
+    computer = None
+    if args.computer:
+        book = OpeningBook(args.book) if os.path.exists(args.book) else None
+        computer = AIPlayer(2, args.time_limit or 0.5, book=book)
     game_over = False
     turn = 0
 
@@ -98,7 +751,11 @@ def main():
             player = 2
             print("Spieler 2 ist am Zug (O)")
 
-        valid_move = False
+        valid_move = computer is not None and player == computer.piece
+        if valid_move:
+            col = computer.choose_move(board)
+            print(f"Computer wählt Spalte {col} ({computer.last_source}, Suchtiefe {computer.last_depth}, "
+                  f"{computer.nodes} Stellungen)")
         while not valid_move:
             try:
                 col = int(input(f"Spieler {player}, wähle eine Spalte (0-6): "))
@@ -109,18 +766,17 @@ def main():
             except ValueError:
                 print("Bitte gib eine Zahl zwischen 0 und 6 ein.")
 
-        row = get_next_open_row(board, col)
-        board[row][col] = player
+        board.play(col, player)
 
         print_board(board)
 
-        if winning_move(board, player):
+        if board.is_win(player):
             print(f"Spieler {player} hat gewonnen!")
             game_over = True
 
         turn += 1
 
-        if np.all(board != 0):  # Wenn das Spielfeld voll ist und niemand gewonnen hat
+        if board.is_full():  # Wenn das Spielfeld voll ist und niemand gewonnen hat
             print("Das Spiel endet Unentschieden!")
             game_over = True
 